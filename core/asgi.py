@@ -5,6 +5,31 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Serving under ASGI
+------------------
+The home page, the boss dashboard and the expenses page are async views: they
+do not hold a worker thread while waiting on the database, and the expenses
+page runs its monthly totals and expense list concurrently. Every middleware
+in settings.MIDDLEWARE is async-capable, so the request stays on the event
+loop end to end (a sync-only middleware would push it back onto a thread).
+The remaining sync views run in Django's thread pool as usual. The CSV
+exports stream an async iterator under ASGI (a sync iterator would be read
+into memory in one piece), fetching rows in chunks through sync_to_async.
+
+    pip install "uvicorn[standard]"
+    TRACKER_DB_PROFILE=production uvicorn core.asgi:application \
+        --host 0.0.0.0 --port 8000 --workers 2
+
+or, with process management, under gunicorn:
+
+    TRACKER_DB_PROFILE=production gunicorn core.asgi:application \
+        -k uvicorn.workers.UvicornWorker --workers 2
+
+Use the production database profile (WAL, busy timeout), since concurrent
+queries from one request read on separate connections. ``runserver`` stays
+WSGI; as with WSGI, the front web server serves /static/ from the
+static/ directory.
 """
 
 import os
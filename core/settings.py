@@ -1,3 +1,5 @@
+import hashlib
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -19,6 +21,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tracking.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,10 +54,32 @@ WSGI_APPLICATION = 'core.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('TRACKER_DB_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# Adatbázis profil: TRACKER_DB_PROFILE=production esetén WAL napló, pragmák a kapcsolat létrehozásakor,
+# várakozás zárolt adatbázisnál és tartós kapcsolatok (stress_log_writes parancs a párhuzamos íráshoz)
+DB_PROFILE = os.environ.get('TRACKER_DB_PROFILE', 'default')
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('TRACKER_DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Másodpercek, ameddig egy író a zárolás feloldására vár "database is locked" helyett
+            'timeout': int(os.environ.get('TRACKER_DB_TIMEOUT', 20)),
+            # Az író tranzakció rögtön az elején kéri a zárat, így olvasásról írásra váltáskor nincs holtpont
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA cache_size=-64000;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
+    })
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -75,3 +100,29 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# A pénzügyi összesítők (tracking.finance_cache) fájl alapú cache-ben vannak, hogy a jelzésekből
+# érkező érvénytelenítés minden worker folyamatra hasson
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'finance': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'finance',
+        'TIMEOUT': 60 * 60 * 24,
+        # A kulcsok az adatbázishoz kötöttek: a fejlesztői, másolt és mérési adatbázisok nem osztoznak a bejegyzéseken
+        'KEY_PREFIX': hashlib.sha1(str(DATABASES['default']['NAME']).encode()).hexdigest()[:12],
+    },
+}
+
+# Kérésenkénti lekérdezés keret (tracking.middleware.QueryBudgetMiddleware, query_budget_report parancs)
+# A mérési napló csak TRACKER_QUERY_BUDGET_LOG megadásakor íródik: kérésenként szinkron fájlírás, forgatás nélkül,
+# ezért mérési időszakokra való (pl. TRACKER_QUERY_BUDGET_LOG=query_budget.jsonl)
+QUERY_BUDGET = {
+    'MAX_QUERIES': 50,
+    'MAX_DB_MS': 500,
+    'MAX_WALL_MS': 1500,
+    'TOP_FINGERPRINTS': 5,
+    'LOG_FILE': os.environ.get('TRACKER_QUERY_BUDGET_LOG') or None,
+}
@@ -9,3 +9,44 @@ document.addEventListener('DOMContentLoaded', function() {
     }, 4000);
   });
 });
+
+// Havi diagram: az adatokat a canvas data-chart-url végpontjából tölti, a hónapváltás újratöltés nélkül történik.
+// A végpont ETag-et küld, így a már látott hónapokra a böngésző gyorsítótára 304 válasz után újra felhasználható.
+function initMonthChart(canvasId, color, options) {
+  var canvas = document.getElementById(canvasId);
+  var chart = new Chart(canvas.getContext('2d'), {
+    type: 'bar',
+    data: { labels: [], datasets: [{ data: [], backgroundColor: 'rgba(' + color + ',0.3)', borderColor: 'rgba(' + color + ',0.8)', borderWidth: 1, borderRadius: 4 }] },
+    options: options
+  });
+
+  function load(year, month, push) {
+    fetch(canvas.dataset.chartUrl + '?year=' + year + '&month=' + month, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+      .then(function(response) { return response.json(); })
+      .then(function(data) {
+        chart.data.labels = data.labels;
+        chart.data.datasets[0].data = data.values;
+        chart.update();
+        document.querySelectorAll('.js-month-label').forEach(function(el) { el.textContent = data.month_name + ' ' + data.year; });
+        document.querySelectorAll('.js-month-nav').forEach(function(link) {
+          var y = data[link.dataset.dir + '_year'], m = data[link.dataset.dir + '_month'];
+          link.dataset.year = y;
+          link.dataset.month = m;
+          link.href = '?month=' + m + '&year=' + y;
+        });
+        if (push) history.pushState({ year: data.year, month: data.month }, '', '?month=' + data.month + '&year=' + data.year);
+      });
+  }
+
+  document.querySelectorAll('.js-month-nav').forEach(function(link) {
+    link.addEventListener('click', function(e) {
+      e.preventDefault();
+      load(link.dataset.year, link.dataset.month, true);
+    });
+  });
+  window.addEventListener('popstate', function(e) {
+    var state = e.state || { year: canvas.dataset.year, month: canvas.dataset.month };
+    load(state.year, state.month, false);
+  });
+  load(canvas.dataset.year, canvas.dataset.month, false);
+}
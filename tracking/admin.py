@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import (
     CustomUser, Project, ProjectMembership, VideoTitle,
-    Log, LogVideoTitleAction, PhotoLogProgress, Expense
+    Log, LogVideoTitleAction, PhotoLogProgress, Expense, DailyRevenue
 )
 
 @admin.register(CustomUser)
@@ -22,6 +22,7 @@ class ProjectAdmin(admin.ModelAdmin):
     list_display = ("title", "company", "project_type", "revenue", "main_deadline", "is_completed")
     list_filter = ("project_type", "is_completed")
     search_fields = ("title", "company")
+    readonly_fields = ("video_title_count", "raw_uploaded_count", "editing_done_count", "logged_hours")
 
 @admin.register(ProjectMembership)
 class ProjectMembershipAdmin(admin.ModelAdmin):
@@ -44,5 +45,11 @@ class ExpenseAdmin(admin.ModelAdmin):
     list_filter = ("date", "created_by")
     search_fields = ("description",)
 
+@admin.register(DailyRevenue)
+class DailyRevenueAdmin(admin.ModelAdmin):
+    list_display = ("day", "project", "hours", "revenue")
+    list_filter = ("project",)
+    date_hierarchy = "day"
+
 admin.site.register(LogVideoTitleAction)
 admin.site.register(PhotoLogProgress)
@@ -0,0 +1,156 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import DailyRevenue
+from .revenue import monthly_revenue_series, monthly_profit_series, monthly_totals
+
+# Saját cache alias (settings.CACHES), hiányában a default
+FINANCE_CACHE_ALIAS = "finance"
+KINDS = ("revenue_series", "profit_series", "totals")
+
+
+def _cache():
+    return caches[FINANCE_CACHE_ALIAS if FINANCE_CACHE_ALIAS in settings.CACHES else "default"]
+
+
+def _generation():
+    """Az invalidate_all() által léptetett generáció, a kulcsok része"""
+    return _cache().get_or_set("finance:generation", time.time_ns(), timeout=None)
+
+
+def _version_key(year, month):
+    return f"finance:version:{year}-{month:02d}"
+
+
+def _versions(months):
+    """Az invalidate_months() által léptetett havi verziók, a kulcsok részei
+
+    A hiányzó (pl. a cache által kiürített) verzió és generáció egyedi kezdőértéket kap, így a korábbi
+    értékekhez tartozó bejegyzések sem olvashatók vissza.
+    """
+    cache = _cache()
+    keys = {_version_key(y, m): (y, m) for (y, m) in months}
+    versions = {keys[k]: v for k, v in cache.get_many(keys).items()}
+    for key, month in keys.items():
+        if month not in versions:
+            versions[month] = cache.get_or_set(key, time.time_ns(), timeout=None)
+    return versions
+
+
+def _key(kind, year, month, generation, version):
+    return f"finance:{generation}:{kind}:{year}-{month:02d}:{version}"
+
+
+def _stat_key(kind, result):
+    return f"finance:stats:{kind}:{result}"
+
+
+def _count(kind, result, n=1):
+    """Találat / hiány számláló (a cache incr nem minden backendben atomi, ezért közelítő)"""
+    if not n:
+        return
+    cache = _cache()
+    key = _stat_key(kind, result)
+    if not cache.add(key, n, timeout=None):
+        try:
+            cache.incr(key, n)
+        except ValueError:
+            cache.set(key, n, timeout=None)
+
+
+def cached_month(kind, year, month, compute):
+    """Egy hónap értéke a cache-ből, hiány esetén compute(year, month) eredménye kerül bele
+
+    A kulcs a számolás előtt olvasott verziót tartalmazza: ha közben egy írás érvényteleníti a hónapot,
+    a régi adatból számolt érték a régi kulcs alá kerül, és többé nem olvasódik.
+    """
+    cache = _cache()
+    key = _key(kind, year, month, _generation(), _versions([(year, month)])[(year, month)])
+    value = cache.get(key)
+    if value is not None:
+        _count(kind, "hits")
+        return value
+    _count(kind, "misses")
+    value = compute(year, month)
+    cache.set(key, value)
+    return value
+
+
+def revenue_series(year, month):
+    return cached_month("revenue_series", year, month, monthly_revenue_series)
+
+
+def profit_series(year, month):
+    return cached_month("profit_series", year, month, monthly_profit_series)
+
+
+def cached_monthly_totals(years):
+    """monthly_totals() havonta cache-elve; csak a hiányzó hónapokat tartalmazó évek számolódnak újra"""
+    cache = _cache()
+    generation = _generation()
+    versions = _versions([(y, m) for y in sorted(set(years)) for m in range(1, 13)])
+    keys = {_key("totals", y, m, generation, v): (y, m) for (y, m), v in versions.items()}
+    found = cache.get_many(keys)
+    totals = {keys[k]: v for k, v in found.items()}
+    missing_years = {y for (y, m) in keys.values() if (y, m) not in totals}
+    _count("totals", "hits", len(found))
+    _count("totals", "misses", len(keys) - len(found))
+    if missing_years:
+        fresh = monthly_totals(missing_years)
+        cache.set_many({
+            _key("totals", y, m, generation, versions[(y, m)]): fresh[(y, m)] for (y, m) in fresh if (y, m) not in totals
+        })
+        totals.update(fresh)
+    return totals
+
+
+def invalidate_months(months):
+    """A megadott (év, hó) párok verziójának léptetése: a hónapok minden pénzügyi összesítője újraszámolódik
+
+    A régi verziójú bejegyzések a TIMEOUT után járnak le.
+    """
+    cache = _cache()
+    for year, month in set(months):
+        key = _version_key(year, month)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def project_months(project_id):
+    """A hónapok, amelyekre a projekt bevétele a naplóban szétosztódik"""
+    return {(d.year, d.month) for d in DailyRevenue.objects.filter(project_id=project_id).dates("day", "month")}
+
+
+def completed_project_months(project_ids):
+    """A lezártak közül a projektek bevételét tartalmazó hónapok egy lekérdezéssel"""
+    days = DailyRevenue.objects.filter(project_id__in=project_ids, project__is_completed=True).dates("day", "month")
+    return {(d.year, d.month) for d in days}
+
+
+def invalidate_all():
+    """Minden hónap érvénytelenítése (pl. a napló újraépítése után); a régi kulcsok a TIMEOUT után járnak le"""
+    cache = _cache()
+    try:
+        cache.incr("finance:generation")
+    except ValueError:
+        cache.set("finance:generation", time.time_ns(), timeout=None)
+
+
+def cache_stats():
+    """{kind: {"hits", "misses", "hit_ratio"}} a folyamatok közös számlálóiból"""
+    cache = _cache()
+    raw = cache.get_many([_stat_key(kind, r) for kind in KINDS for r in ("hits", "misses")])
+    stats = {}
+    for kind in KINDS:
+        hits = raw.get(_stat_key(kind, "hits"), 0)
+        misses = raw.get(_stat_key(kind, "misses"), 0)
+        stats[kind] = {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses) if hits + misses else None}
+    return stats
+
+
+def reset_stats():
+    _cache().delete_many([_stat_key(kind, r) for kind in KINDS for r in ("hits", "misses")])
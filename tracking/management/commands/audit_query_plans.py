@@ -0,0 +1,78 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tracking.finance_cache import invalidate_all
+from tracking.middleware import fingerprint, recording
+from tracking.search import employee_index
+
+from .benchmark_views import view_requests
+
+# Táblák, amelyeket a nézetek szándékosan teljes egészében listáznak (pl. az összes projekt oldal)
+ALLOWED_SCANS = {"tracking_project", "tracking_customuser"}
+
+# A SCAN keresési feltétel nélkül fut végig a táblán vagy (USING [COVERING] INDEX) egy teljes indexen
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?$")
+_ALIAS = re.compile(r'"(\w+)" (?:AS )?"?([A-Z]\d+)"?\b')
+
+
+class Command(BaseCommand):
+    help = (
+        "A nézetek lekérdezéseinek visszajátszása EXPLAIN QUERY PLAN-nel; a teljes tábla és index olvasásokat "
+        "(SCAN) jelzi és hibával lép ki, így telepítés előtt kiderülnek a hiányzó indexek"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", nargs="*", help="Csak ezek az URL nevek")
+        parser.add_argument("--allow", nargs="*", default=[], help="További táblák, amelyeknél a teljes olvasás elfogadott")
+        parser.add_argument("--verbose-plans", action="store_true", help="Minden lekérdezés tervének kiírása")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Az audit az SQLite EXPLAIN QUERY PLAN kimenetét értelmezi.")
+        allowed = ALLOWED_SCANS | set(options["allow"])
+        # A SCAN sorokban al-lekérdezések (pl. ablakfüggvény szűrés "qualify") is szerepelhetnek, ezek nem táblák
+        tables = set(connection.introspection.table_names())
+        findings = 0
+        for name, client, url in view_requests(options["only"]):
+            # A cache-elt összesítők és a keresőindex elrejtenék a lekérdezéseket
+            invalidate_all()
+            employee_index.invalidate()
+            # Az async nézetek külön szálon, külön kapcsolaton futó lekérdezései is ide kerülnek
+            with recording(keep_queries=True) as recorder:
+                response = client.get(url)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            seen, flagged = set(), []
+            for sql, params in recorder.queries:
+                if not sql.lstrip().upper().startswith("SELECT") or fingerprint(sql) in seen:
+                    continue
+                seen.add(fingerprint(sql))
+                plan = self.explain(sql, params)
+                aliases = dict((alias, table) for table, alias in _ALIAS.findall(sql))
+                scans = []
+                for detail in plan:
+                    match = _FULL_SCAN.match(detail)
+                    if match:
+                        table = aliases.get(match.group(1), match.group(1))
+                        if table in tables and table not in allowed:
+                            scans.append(f"{table} ({match.group(2)})" if match.group(2) else table)
+                if scans:
+                    flagged.append((scans, sql, plan))
+                elif options["verbose_plans"]:
+                    self.stdout.write(f"    {sql[:160]}\n      " + "\n      ".join(plan))
+            status = self.style.ERROR("SCAN") if flagged else self.style.SUCCESS("OK")
+            self.stdout.write(f"{name:<28} {response.status_code:>4} {len(seen):>4} lekérd.  {status}")
+            for scans, sql, plan in flagged:
+                self.stdout.write(f"    teljes olvasás: {', '.join(scans)}\n    {sql[:300]}")
+                self.stdout.write("      " + "\n      ".join(plan))
+            findings += len(flagged)
+        if findings:
+            raise CommandError(f"{findings} lekérdezés teljes tábla olvasással.")
+        self.stdout.write(self.style.SUCCESS("Nincs teljes tábla olvasás."))
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
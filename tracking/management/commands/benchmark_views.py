@@ -0,0 +1,115 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking import urls as tracking_urls
+from tracking.middleware import percentile, recording
+from tracking.models import CustomUser, Log, Expense
+
+# Ezeket a nézeteket nem mérjük (munkamenetet zárnak le)
+SKIPPED_VIEWS = {"logout"}
+# Extra GET paraméterek, amelyek nélkül a nézet nem ad érdemi választ
+EXTRA_QUERY = {"employee_autocomplete": "?q=a"}
+
+
+def view_requests(only=None):
+    """(URL név, bejelentkezett kliens, URL) a tracking/urls.py minden mérhető nézetére, a demó adatbázis alapján
+
+    Az audit_query_plans parancs is ezt használja.
+    """
+    if "testserver" not in settings.ALLOWED_HOSTS and "*" not in settings.ALLOWED_HOSTS:
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+    boss = CustomUser.objects.filter(is_boss=True).first()
+    log = Log.objects.select_related("user", "project").filter(user__is_boss=False).order_by("-date").first()
+    if not boss or not log:
+        raise CommandError("Nincs boss felhasználó vagy log; futtasd előbb a seed_demo_data parancsot.")
+    expense = Expense.objects.first()
+    kwargs = {
+        "employee_id": log.user_id, "project_id": log.project_id, "log_id": log.pk,
+        "expense_id": expense.pk if expense else 0,
+    }
+    clients = {key: Client(raise_request_exception=False) for key in ("boss", "crew", "anonymous")}
+    clients["boss"].force_login(boss)
+    clients["crew"].force_login(log.user)
+
+    for pattern in tracking_urls.urlpatterns:
+        name = pattern.name
+        if name in SKIPPED_VIEWS or (only and name not in only):
+            continue
+        url = reverse(name, kwargs={k: kwargs[k] for k in pattern.pattern.converters}) + EXTRA_QUERY.get(name, "")
+        if name == "login":
+            client = clients["anonymous"]
+        elif str(pattern.pattern).startswith(("boss/", "ajax/")) or name in ("home", "password_change"):
+            client = clients["boss"]
+        else:
+            client = clients["crew"]
+        yield name, client, url
+
+
+class Command(BaseCommand):
+    help = "A tracking/urls.py összes nézetének mérése a teszt klienssel: késleltetés percentilisek és lekérdezésszám"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=10, help="Mérések száma nézetenként")
+        parser.add_argument("--warmup", type=int, default=1)
+        parser.add_argument("--output", help="Az eredmény mentése JSON fájlba")
+        parser.add_argument("--compare", help="Korábbi JSON eredmény, amihez képest a változást mutatja")
+        parser.add_argument("--only", nargs="*", help="Csak ezek az URL nevek")
+
+    def handle(self, *args, **options):
+        results = {}
+        for name, client, url in view_requests(options["only"]):
+            results[name] = self.measure(client, url, options["repeat"], options["warmup"])
+            self.stdout.write(self.format_row(name, results[name]))
+
+        report = {"created_at": timezone.now().isoformat(), "repeat": options["repeat"], "views": results}
+        if options["compare"]:
+            self.compare(report, options["compare"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Eredmény mentve: {options['output']}"))
+
+    def measure(self, client, url, repeat, warmup):
+        for _ in range(warmup):
+            client.get(url)
+        timings, queries, status = [], [], None
+        for _ in range(repeat):
+            # A sync_to_async szálak kapcsolatain futó lekérdezéseket is számolja
+            with recording() as recorder:
+                start = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(recorder.count)
+            status = response.status_code
+        return {
+            "url": url, "status": status,
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "max_ms": round(max(timings), 2),
+            "queries": max(queries),
+        }
+
+    def format_row(self, name, r):
+        return f"{name:<28} {r['status']:>4} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['max_ms']:>9.1f} ms {r['queries']:>6} lekérd."
+
+    def compare(self, report, path):
+        with open(path, encoding="utf-8") as f:
+            previous = json.load(f)["views"]
+        self.stdout.write(f"\nVáltozás a {path} méréshez képest (p50, lekérdezésszám):")
+        for name, r in report["views"].items():
+            if name not in previous:
+                continue
+            before = previous[name]
+            self.stdout.write(
+                f"{name:<28} {before['p50_ms']:>9.1f} -> {r['p50_ms']:>9.1f} ms   "
+                f"{before['queries']:>5} -> {r['queries']:>5} lekérd."
+            )
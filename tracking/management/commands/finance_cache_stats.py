@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from tracking.finance_cache import cache_stats, reset_stats, invalidate_all
+
+
+class Command(BaseCommand):
+    help = "A pénzügyi összesítő cache találat / hiány számlálói"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="A számlálók nullázása")
+        parser.add_argument("--invalidate", action="store_true", help="Minden cache-elt hónap érvénytelenítése")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'összesítő':<16} {'találat':>9} {'hiány':>9} {'arány':>7}")
+        for kind, s in cache_stats().items():
+            ratio = f"{s['hit_ratio']:.0%}" if s["hit_ratio"] is not None else "-"
+            self.stdout.write(f"{kind:<16} {s['hits']:>9} {s['misses']:>9} {ratio:>7}")
+        if options["reset"]:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Számlálók nullázva."))
+        if options["invalidate"]:
+            invalidate_all()
+            self.stdout.write(self.style.SUCCESS("Pénzügyi cache érvénytelenítve."))
@@ -0,0 +1,306 @@
+import csv
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import time as day_time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from tracking.finance_cache import invalidate_all
+from tracking.models import CustomUser, Expense, Log, Project, ProjectMembership, VideoTitle
+from tracking.revenue import refresh_ledger
+
+BATCH_SIZE = 2000
+# Ennyi elutasított sort ír ki a konzolra, a többi csak a --rejects fájlba kerül
+MAX_REPORTED = 20
+# Fájlfajtánként a kötelező és az opcionális oszlopok (az export_logs / export_expenses fejlécei)
+COLUMNS = {
+    "logs": (("Felhasználónév", "Projekt", "Cég", "Órák"), ("Nap", "Rögzítve", "Megjegyzés")),
+    "titles": (("Projekt", "Cég", "Cím"), ("Felvevő", "Rögzítve", "Nyersanyag feltöltve", "Vágás kész")),
+    "expenses": (("Dátum", "Leírás", "Összeg (Ft)"), ("Felvevő",)),
+}
+MODELS = {"logs": Log, "titles": VideoTitle, "expenses": Expense}
+FLAGS = {"": False, "igen": True, "nem": False, "i": True, "n": False, "1": True, "0": False, "true": True, "false": False}
+# Mezők, amelyeket az auto_now_add felülírna; importnál a fájlbeli dátum marad
+HISTORICAL_FIELDS = {"logs": ("date",), "titles": ("created_at",), "expenses": ("date",)}
+
+
+class RowError(ValueError):
+    pass
+
+
+@contextmanager
+def _keep_dates(model, field_names):
+    """Az auto_now_add ideiglenes kikapcsolása, hogy a bulk_create a megadott múltbeli dátumot írja"""
+    fields = [model._meta.get_field(name) for name in field_names]
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+def _clean(model, name, value, column):
+    """A modell mező saját ellenőrzése (max_length, max_digits, decimal_places), soronként űrlap nélkül"""
+    try:
+        return model._meta.get_field(name).clean(value, None)
+    except ValidationError as exc:
+        raise RowError(f"{column}: {' '.join(exc.messages)}")
+
+
+def _number(value):
+    """Táblázatkezelős számformátum ("12 000", "1,5") normalizálása"""
+    return value.replace("\xa0", "").replace(" ", "").replace(",", ".")
+
+
+def _parse_flag(value, column):
+    """Igen / nem oszlop; üres érték hamis"""
+    flag = FLAGS.get(value.casefold())
+    if flag is None:
+        raise RowError(f"{column}: érvénytelen érték ({value!r}), igen vagy nem szükséges")
+    return flag
+
+
+def _parse_day(value, column):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise RowError(f"{column}: érvénytelen dátum ({value!r}), ÉÉÉÉ-HH-NN formátum szükséges")
+    return day
+
+
+def _parse_moment(value, column):
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise RowError(f"{column}: érvénytelen időpont ({value!r}), ÉÉÉÉ-HH-NN ÓÓ:PP formátum szükséges")
+    return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+
+
+class Command(BaseCommand):
+    help = (
+        "Régi logok, videó címek vagy kiadások tömeges importja CSV-ből (az exportok fejléceivel). A felhasználók "
+        "és projektek természetes kulcs alapján, memóriabeli táblákból oldódnak fel, a sorok kötegenként "
+        "bulk_create-tel, tranzakcióban íródnak; a hibás sorok kimaradnak és a --rejects fájlba kerülnek. "
+        "Ugyanazt a fájlt kétszer importálva a logok és kiadások megduplázódnak; a projektben már meglévő "
+        "(kis-nagybetűtől függetlenül azonos) videó címek sorai elutasítódnak."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(COLUMNS), help="A fájl tartalma")
+        parser.add_argument("path", help="CSV fájl (fejléc sorral)")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Sorok száma tranzakciónként")
+        parser.add_argument("--delimiter", help="Mezőelválasztó (alapértelmezés: felismerés , ; és tab közül)")
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument("--rejects", help="Az elutasított sorok mentése ide (eredeti oszlopok + Sor, Hiba)")
+        parser.add_argument("--dry-run", action="store_true", help="Csak ellenőrzés, írás nélkül")
+        parser.add_argument(
+            "--add-memberships", action="store_true",
+            help="Hiányzó projekt tagság létrehozása a log szerzőjének (különben a sor elutasítva)",
+        )
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        self.options = options
+        self.load_lookups(kind)
+        build = getattr(self, f"build_{kind}")
+        model = MODELS[kind]
+        imported, rejected, reported = 0, 0, []
+        self.touched_projects = set()
+        started = time.perf_counter()
+
+        try:
+            source = open(options["path"], newline="", encoding=options["encoding"])
+        except OSError as exc:
+            raise CommandError(f"A fájl nem olvasható: {exc}")
+        rejects_file = rejects = None
+        try:
+            reader = csv.DictReader(source, dialect=self.dialect(source))
+            required, optional = COLUMNS[kind]
+            missing = [c for c in required if c not in (reader.fieldnames or [])]
+            if kind == "logs" and not {"Nap", "Rögzítve"} & set(reader.fieldnames or []):
+                missing.append("Nap vagy Rögzítve")
+            if missing:
+                raise CommandError(f"Hiányzó oszlopok: {', '.join(missing)} (elvárt: {', '.join(required + optional)})")
+            if options["rejects"]:
+                rejects_file = open(options["rejects"], "w", newline="", encoding="utf-8-sig")
+                rejects = csv.writer(rejects_file)
+                rejects.writerow([*reader.fieldnames, "Sor", "Hiba"])
+
+            batch = []
+            with _keep_dates(model, HISTORICAL_FIELDS[kind]):
+                for row in reader:
+                    try:
+                        batch.append(build({k: (v or "").strip() for k, v in row.items() if k is not None}))
+                    except RowError as exc:
+                        rejected += 1
+                        if len(reported) < MAX_REPORTED:
+                            reported.append(f"  {reader.line_num}. sor: {exc}")
+                        if rejects:
+                            rejects.writerow([*(row.get(c) for c in reader.fieldnames), reader.line_num, str(exc)])
+                        continue
+                    if len(batch) >= options["batch_size"]:
+                        imported += self.flush(model, batch)
+                        batch = []
+                imported += self.flush(model, batch)
+        finally:
+            source.close()
+            if rejects_file:
+                rejects_file.close()
+            # Megszakadt import után is egyezzenek a már beírt kötegekkel a számlálók és a napló
+            if imported and not options["dry_run"]:
+                self.finish(kind)
+
+        elapsed = time.perf_counter() - started
+        for line in reported:
+            self.stdout.write(self.style.WARNING(line))
+        if rejected > len(reported):
+            self.stdout.write(self.style.WARNING(f"  ... és további {rejected - len(reported)} hibás sor"))
+        verb = "Ellenőrizve" if options["dry_run"] else "Importálva"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb}: {imported} sor, elutasítva: {rejected} ({elapsed:.1f} s, {imported / elapsed if elapsed else 0:.0f} sor/s)."
+        ))
+
+    def dialect(self, source):
+        if self.options["delimiter"]:
+            return type("Dialect", (csv.excel,), {"delimiter": self.options["delimiter"]})
+        sample = source.read(64 * 1024)
+        source.seek(0)
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            return csv.excel
+
+    def load_lookups(self, kind):
+        """Természetes kulcs -> pk táblák egy-egy lekérdezéssel; a nem egyértelmű kulcsok értéke None"""
+        self.users, self.user_names = {}, {}
+        for pk, username, first, last in CustomUser.objects.values_list("pk", "username", "first_name", "last_name"):
+            self.users[username] = pk
+            name = f"{first} {last}".strip()
+            if name:
+                self.user_names[name] = None if name in self.user_names else pk
+        self.projects = {}
+        if kind in ("logs", "titles"):
+            for pk, title, company in Project.objects.values_list("pk", "title", "company"):
+                key = (title, company)
+                self.projects[key] = None if key in self.projects else pk
+        # (projekt, kisbetűs cím) párok; egy projekt címei az első rá hivatkozó sornál töltődnek be
+        self.titles, self.title_projects = set(), set()
+        self.members = set()
+        if kind == "logs":
+            self.members = set(ProjectMembership.objects.values_list("user_id", "project_id"))
+        self.new_members = []
+
+    def user_id(self, value, column, required=True):
+        """Felhasználónév, vagy (ha egyértelmű) a teljes név, ahogy az export Felvevő oszlopa írja"""
+        if not value:
+            if required:
+                raise RowError(f"{column}: hiányzik")
+            return None
+        pk = self.users.get(value) or self.user_names.get(value)
+        if pk is None:
+            reason = "nem egyértelmű név" if value in self.user_names else "ismeretlen felhasználó"
+            raise RowError(f"{column}: {reason} ({value!r})")
+        return pk
+
+    def project_id(self, row):
+        key = (row["Projekt"], row["Cég"])
+        if key not in self.projects:
+            raise RowError(f"ismeretlen projekt ({key[0]!r}, {key[1]!r})")
+        if self.projects[key] is None:
+            raise RowError(f"több projekt is van ezzel a címmel és céggel ({key[0]!r}, {key[1]!r})")
+        return self.projects[key]
+
+    def build_logs(self, row):
+        user_id = self.user_id(row["Felhasználónév"], "Felhasználónév")
+        project_id = self.project_id(row)
+        hours = _clean(Log, "hours", _number(row["Órák"]), "Órák")
+        if hours <= 0:
+            raise RowError("Órák: pozitív óraszám szükséges")
+        day = _parse_day(row["Nap"], "Nap") if row.get("Nap") else None
+        if row.get("Rögzítve"):
+            logged_at = _parse_moment(row["Rögzítve"], "Rögzítve")
+            if day and timezone.localdate(logged_at) != day:
+                raise RowError(f"a Nap ({day}) és a Rögzítve ({row['Rögzítve']}) napja eltér")
+        elif day:
+            logged_at = timezone.make_aware(datetime.combine(day, day_time(12)))
+        else:
+            raise RowError("Nap vagy Rögzítve: hiányzik")
+        if (user_id, project_id) not in self.members:
+            if not self.options["add_memberships"]:
+                raise RowError("a felhasználó nem tagja a projektnek (--add-memberships)")
+            self.members.add((user_id, project_id))
+            self.new_members.append(ProjectMembership(user_id=user_id, project_id=project_id, joined_at=logged_at))
+        self.touched_projects.add(project_id)
+        # A bulk_create nem hívja a save()-et, ezért a work_date-et itt kell kitölteni
+        return Log(
+            user_id=user_id, project_id=project_id, date=logged_at, work_date=timezone.localdate(logged_at),
+            hours=hours, comment=_clean(Log, "comment", row.get("Megjegyzés", ""), "Megjegyzés") or None,
+        )
+
+    def build_titles(self, row):
+        """Kis-nagybetű független duplikáció szűrés projektenként, a meglévő és a fájlbeli címek között is"""
+        project_id = self.project_id(row)
+        title = _clean(VideoTitle, "title", row["Cím"], "Cím")
+        if project_id not in self.title_projects:
+            self.title_projects.add(project_id)
+            existing = VideoTitle.objects.filter(project_id=project_id).values_list("title", flat=True)
+            self.titles.update((project_id, t.casefold()) for t in existing)
+        if (project_id, title.casefold()) in self.titles:
+            raise RowError(f"Cím: a projektben már van ilyen című videó ({title!r})")
+        raw_uploaded = _parse_flag(row.get("Nyersanyag feltöltve", ""), "Nyersanyag feltöltve")
+        editing_done = _parse_flag(row.get("Vágás kész", ""), "Vágás kész")
+        if editing_done and not raw_uploaded:
+            raise RowError("Vágás kész: csak feltöltött nyersanyagú videó lehet megvágva")
+        created_at = _parse_moment(row["Rögzítve"], "Rögzítve") if row.get("Rögzítve") else timezone.now()
+        created_by_id = self.user_id(row.get("Felvevő", ""), "Felvevő", required=False)
+        self.titles.add((project_id, title.casefold()))
+        self.touched_projects.add(project_id)
+        return VideoTitle(
+            project_id=project_id, title=title, created_at=created_at, created_by_id=created_by_id,
+            raw_uploaded=raw_uploaded, editing_done=editing_done,
+        )
+
+    def build_expenses(self, row):
+        amount = _clean(Expense, "amount", _number(row["Összeg (Ft)"]), "Összeg (Ft)")
+        if amount <= 0:
+            raise RowError("Összeg (Ft): pozitív összeg szükséges")
+        return Expense(
+            amount=amount, description=_clean(Expense, "description", row["Leírás"], "Leírás"),
+            date=_parse_day(row["Dátum"], "Dátum"),
+            created_by_id=self.user_id(row.get("Felvevő", ""), "Felvevő", required=False),
+        )
+
+    def flush(self, model, objs):
+        """Egy köteg beírása egy tranzakcióban (a hiányzó tagságokkal együtt)"""
+        if not objs:
+            return 0
+        if not self.options["dry_run"]:
+            with transaction.atomic(), _keep_dates(ProjectMembership, ("joined_at",)):
+                ProjectMembership.objects.bulk_create(self.new_members, batch_size=BATCH_SIZE, ignore_conflicts=True)
+                model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+        self.new_members = []
+        if self.options["verbosity"] > 1:
+            self.stdout.write(f"  +{len(objs)} sor")
+        return len(objs)
+
+    def finish(self, kind):
+        """A bulk_create kihagyja a signalokat: számlálók, bevételi napló és pénzügyi cache frissítése egyben"""
+        project_ids = sorted(self.touched_projects)
+        if project_ids:
+            Project.objects.filter(pk__in=project_ids).update(**Project.counter_expressions())
+        if kind == "logs":
+            refresh_ledger(project_ids)
+        if kind in ("logs", "expenses"):
+            invalidate_all()
@@ -0,0 +1,58 @@
+import json
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracking.middleware import percentile, query_budget_settings
+
+
+class Command(BaseCommand):
+    help = "A QueryBudgetMiddleware által rögzített mérések összesítése: a legrosszabb végpontok"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="A mérési napló (alapértelmezés: QUERY_BUDGET['LOG_FILE'])")
+        parser.add_argument("--sort", choices=("queries", "db_ms", "wall_ms"), default="db_ms")
+        parser.add_argument("--limit", type=int, default=10)
+
+    def handle(self, *args, **options):
+        path = options["file"] or query_budget_settings()["LOG_FILE"]
+        if not path:
+            raise CommandError("Nincs mérési napló: adj meg --file-t, vagy a méréshez állítsd be a TRACKER_QUERY_BUDGET_LOG-ot.")
+        samples = defaultdict(list)
+        fingerprints = defaultdict(Counter)
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    sample = json.loads(line)
+                    samples[sample["url_name"]].append(sample)
+                    for sql, n in sample.get("top_fingerprints", []):
+                        fingerprints[sample["url_name"]][sql] += n
+        except FileNotFoundError:
+            raise CommandError(f"A mérési napló nem található: {path}")
+
+        budget = query_budget_settings()
+        rows = []
+        for url_name, items in samples.items():
+            rows.append({
+                "url_name": url_name,
+                "requests": len(items),
+                "queries": percentile([s["queries"] for s in items], 95),
+                "db_ms": percentile([s["db_ms"] for s in items], 95),
+                "wall_ms": percentile([s["wall_ms"] for s in items], 95),
+                "over_budget": sum(1 for s in items if "top_fingerprints" in s),
+            })
+        rows.sort(key=lambda r: r[options["sort"]], reverse=True)
+
+        self.stdout.write(
+            f"Keret: {budget['MAX_QUERIES']} lekérdezés, {budget['MAX_DB_MS']} ms DB, {budget['MAX_WALL_MS']} ms összesen (p95 értékek)"
+        )
+        self.stdout.write(f"{'URL név':<32} {'kérés':>6} {'lekérd.':>8} {'DB ms':>9} {'össz. ms':>9} {'túllépés':>9}")
+        for row in rows[:options["limit"]]:
+            self.stdout.write(
+                f"{row['url_name']:<32} {row['requests']:>6} {row['queries']:>8} {row['db_ms']:>9.1f} "
+                f"{row['wall_ms']:>9.1f} {row['over_budget']:>9}"
+            )
+            for sql, n in fingerprints[row["url_name"]].most_common(3):
+                self.stdout.write(f"    {n}x {sql[:160]}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tracking.models import Project
+
+
+class Command(BaseCommand):
+    help = "A projektek denormalizált számlálóinak (videó címek, órák) újraszámolása"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_ids", nargs="*", type=int, help="Csak ezek a projektek (alapértelmezés: mind)")
+
+    def handle(self, *args, **options):
+        projects = Project.objects.all()
+        if options["project_ids"]:
+            projects = projects.filter(pk__in=options["project_ids"])
+        count = projects.update(**Project.counter_expressions())
+        self.stdout.write(self.style.SUCCESS(f"Számlálók újraszámolva: {count} projekt."))
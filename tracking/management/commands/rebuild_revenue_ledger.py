@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from tracking.finance_cache import invalidate_all
+from tracking.revenue import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "A napi bevételi napló (DailyRevenue) teljes újraépítése a logokból"
+
+    def handle(self, *args, **options):
+        count = rebuild_ledger()
+        invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f"Napló újraépítve: {count} sor."))
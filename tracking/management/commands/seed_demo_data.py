@@ -0,0 +1,201 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from tracking.models import (
+    CustomUser, Project, ProjectMembership, VideoTitle,
+    Log, LogVideoTitleAction, PhotoLogProgress, Expense,
+)
+from tracking.finance_cache import invalidate_all
+from tracking.revenue import rebuild_ledger
+
+FIRST_NAMES = ["Áron", "Bence", "Csilla", "Dóra", "Eszter", "Ferenc", "Gábor", "Hanna", "István", "Júlia",
+               "Kata", "László", "Márton", "Nóra", "Orsolya", "Péter", "Réka", "Sándor", "Tímea", "Zoltán"]
+LAST_NAMES = ["Nagy", "Kovács", "Tóth", "Szabó", "Horváth", "Varga", "Kiss", "Molnár", "Németh", "Farkas",
+              "Balogh", "Papp", "Takács", "Juhász", "Lakatos", "Mészáros", "Oláh", "Simon", "Rácz", "Fekete"]
+COMPANIES = ["Alfa Kft.", "Béta Zrt.", "Gamma Bt.", "Delta Kft.", "Epszilon Zrt.", "Zéta Kft."]
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Valósághű teszt adatbázis generálása (dolgozók, projektek, videó címek, logok, kiadások)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0, help="Szorzó a dolgozók, projektek és kiadások számára")
+        parser.add_argument("--users-per-role", type=int, default=10)
+        parser.add_argument("--projects-per-type", type=int, default=50, help="Projektek száma típusonként (video/photo/both)")
+        parser.add_argument("--logs-per-member", type=int, default=8, help="Átlagos logszám tagságonként")
+        parser.add_argument("--months", type=int, default=24, help="Ennyi hónapra visszamenőleg generál")
+        parser.add_argument("--expenses-per-month", type=int, default=15)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--password", default="demo1234", help="A generált felhasználók jelszava")
+        parser.add_argument("--flush", action="store_true", help="A meglévő (nem boss) adatok törlése előtte")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        for key in ("users_per_role", "projects_per_type", "expenses_per_month"):
+            options[key] = max(1, round(options[key] * options["scale"]))
+        if Project.objects.exists() and not options["flush"]:
+            raise CommandError("Az adatbázisban már vannak projektek; használd a --flush kapcsolót.")
+        with transaction.atomic():
+            if options["flush"]:
+                Expense.objects.all().delete()
+                Project.objects.all().delete()
+                CustomUser.objects.filter(is_boss=False, is_superuser=False).delete()
+            boss = self.create_users(rng, options)
+            projects = self.create_projects(rng, options, boss)
+            memberships = self.create_memberships(rng, projects)
+            self.create_logs(rng, options, memberships)
+            self.create_expenses(rng, options, boss)
+            Project.objects.update(**Project.counter_expressions())
+            rebuild_ledger()
+        invalidate_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Kész: {CustomUser.objects.count()} felhasználó, {Project.objects.count()} projekt, "
+            f"{VideoTitle.objects.count()} videó cím, {Log.objects.count()} log, {Expense.objects.count()} kiadás."
+        ))
+
+    def create_users(self, rng, options):
+        password = make_password(options["password"])
+        users = []
+        for role, _ in CustomUser.JOB_ROLES:
+            for i in range(options["users_per_role"]):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                users.append(CustomUser(
+                    username=f"{role}{i + 1}", first_name=first, last_name=last, job_role=role,
+                    email=f"{role}{i + 1}@example.com", password=password,
+                ))
+        CustomUser.objects.bulk_create(users, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        boss, _ = CustomUser.objects.get_or_create(username="boss", defaults={"is_boss": True, "password": password})
+        return boss
+
+    def create_projects(self, rng, options, boss):
+        today = timezone.localdate()
+        tz = timezone.get_current_timezone()
+        projects = []
+        for project_type, _ in Project.PROJECT_TYPES:
+            for i in range(options["projects_per_type"]):
+                start = today - timedelta(days=rng.randint(-60, options["months"] * 30))
+                has_video = project_type in ("video", "both")
+                has_photo = project_type in ("photo", "both")
+                counts = {role: rng.randint(1, 3) for role in Project.ROLE_MAX_FIELDS}
+                pay = {role: Decimal(rng.randint(5, 40) * 5000) for role in Project.ROLE_MAX_FIELDS}
+                allocated = sum(counts[r] * pay[r] for r in counts)
+                projects.append(Project(
+                    title=f"{project_type.capitalize()} projekt {i + 1}",
+                    company=rng.choice(COMPANIES),
+                    revenue=allocated + Decimal(rng.randint(10, 200) * 10000),
+                    project_type=project_type,
+                    location=rng.choice(["Budapest", "Debrecen", "Szeged", "Pécs", "Győr"]),
+                    required_video_count=rng.randint(2, 12) if has_video else 0,
+                    max_writer_count=counts["iro"] if has_video else 0,
+                    max_videographer_count=counts["videos"] if has_video else 0,
+                    max_editor_count=counts["vago"] if has_video else 0,
+                    max_photographer_count=counts["fotos"] if has_photo else 0,
+                    pay_writer=pay["iro"], pay_videographer=pay["videos"],
+                    pay_editor=pay["vago"], pay_photographer=pay["fotos"],
+                    writer_deadline=start + timedelta(days=10) if has_video else None,
+                    videographer_date=start + timedelta(days=15) if has_video else None,
+                    editor_deadline=start + timedelta(days=30) if has_video else None,
+                    photo_onsite_date=start + timedelta(days=12) if has_photo else None,
+                    photo_editing_deadline=start + timedelta(days=25) if has_photo else None,
+                    onsite_hours=rng.randint(4, 12),
+                    total_hours_expected=rng.randint(20, 120),
+                    is_completed=start + timedelta(days=30) < today and rng.random() < 0.85,
+                    created_by=boss,
+                ))
+        for project in projects:
+            if project.is_completed:
+                # A logok az első munkanaptól 30 napon belül készülnek (create_logs), a lezárás ezután
+                first_day = (project.writer_deadline or project.photo_onsite_date) - timedelta(days=10)
+                done = datetime.combine(first_day + timedelta(days=30 + rng.randint(1, 10)), time(17), tz)
+                project.completed_at = min(done, timezone.now())
+        return Project.objects.bulk_create(projects, batch_size=BATCH_SIZE)
+
+    def create_memberships(self, rng, projects):
+        by_role = {}
+        for user in CustomUser.objects.filter(is_boss=False).exclude(job_role=None):
+            by_role.setdefault(user.job_role, []).append(user)
+        memberships = []
+        for project in projects:
+            for role, users in by_role.items():
+                count = min(project.role_max_for(role), len(users))
+                for user in rng.sample(users, count):
+                    memberships.append(ProjectMembership(user=user, project=project))
+        ProjectMembership.objects.bulk_create(memberships, batch_size=BATCH_SIZE)
+        return memberships
+
+    def create_logs(self, rng, options, memberships):
+        tz = timezone.get_current_timezone()
+        now = timezone.now()
+        writers = {m.project.pk: m.user for m in memberships if m.user.job_role == "iro"}
+        titles_by_project = {}
+        for project in {m.project for m in memberships}:
+            if project.project_type in ("video", "both"):
+                titles_by_project[project.pk] = [
+                    VideoTitle(project=project, title=f"{project.title} – {n + 1}. videó", created_by=writers.get(project.pk))
+                    for n in range(project.required_video_count)
+                ]
+        VideoTitle.objects.bulk_create([t for ts in titles_by_project.values() for t in ts], batch_size=BATCH_SIZE)
+
+        logs, log_dates, progress, actions = [], [], [], []
+        for m in memberships:
+            project, user = m.project, m.user
+            first_day = project.writer_deadline or project.photo_onsite_date
+            first_day -= timedelta(days=10)
+            for n in range(max(1, int(rng.gauss(options["logs_per_member"], 2)))):
+                day = first_day + timedelta(days=rng.randint(0, 30))
+                when = datetime.combine(day, time(rng.randint(8, 19), rng.choice((0, 15, 30, 45))), tz)
+                if when > now:
+                    continue
+                log = Log(user=user, project=project, work_date=day, hours=Decimal(rng.randint(1, 20)) / 2, comment="")
+                logs.append(log)
+                log_dates.append(when)
+        Log.objects.bulk_create(logs, batch_size=BATCH_SIZE)
+        # auto_now_add miatt a múltbeli dátumokat utólag kell beállítani (a bulk_create a save()-et sem hívja)
+        for log, when in zip(logs, log_dates):
+            log.date = when
+            log.work_date = timezone.localdate(when)
+        Log.objects.bulk_update(logs, ["date", "work_date"], batch_size=BATCH_SIZE)
+
+        for log in logs:
+            if log.user.job_role == "fotos":
+                done = log.project.is_completed or rng.random() < 0.3
+                progress.append(PhotoLogProgress(log=log, fieldwork_done=done or rng.random() < 0.5, editing_done=done))
+            elif log.user.job_role in ("videos", "vago"):
+                flag = "raw_uploaded" if log.user.job_role == "videos" else "editing_done"
+                pending = [t for t in titles_by_project.get(log.project_id, []) if not getattr(t, flag)
+                           and (flag == "raw_uploaded" or t.raw_uploaded)]
+                for title in pending[:rng.randint(0, 3)]:
+                    setattr(title, flag, True)
+                    setattr(title, f"{flag}_by", log.user)
+                    setattr(title, f"{flag}_at", log.date)
+                    actions.append(LogVideoTitleAction(
+                        log=log, video_title=title, action_type="filmed" if flag == "raw_uploaded" else "edited",
+                    ))
+        PhotoLogProgress.objects.bulk_create(progress, batch_size=BATCH_SIZE)
+        VideoTitle.objects.bulk_update(
+            [t for ts in titles_by_project.values() for t in ts],
+            ["raw_uploaded", "raw_uploaded_by", "raw_uploaded_at", "editing_done", "editing_done_by", "editing_done_at"],
+            batch_size=BATCH_SIZE,
+        )
+        LogVideoTitleAction.objects.bulk_create(actions, batch_size=BATCH_SIZE)
+
+    def create_expenses(self, rng, options, boss):
+        today = timezone.localdate()
+        expenses = []
+        for _ in range(options["months"] * options["expenses_per_month"]):
+            expenses.append(Expense(
+                amount=Decimal(rng.randint(1, 200) * 1000),
+                description=rng.choice(["Eszközbérlés", "Utazás", "Szoftver licenc", "Iroda", "Catering", "Stúdió"]),
+                created_by=boss,
+            ))
+        Expense.objects.bulk_create(expenses, batch_size=BATCH_SIZE)
+        for expense in expenses:
+            expense.date = today - timedelta(days=rng.randint(0, options["months"] * 30))
+        Expense.objects.bulk_update(expenses, ["date"], batch_size=BATCH_SIZE)
@@ -0,0 +1,136 @@
+import logging
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import reverse
+
+from tracking.middleware import percentile
+from tracking.models import Log, Project, ProjectMembership
+
+
+class Command(BaseCommand):
+    help = (
+        "Párhuzamos log beküldések (new_log nézet) több szálról, közben olvasó oldallekérésekkel: hibák, "
+        "késleltetés és új kapcsolatok száma az aktuális adatbázis profillal. Adatbázis másolaton futtasd (TRACKER_DB_PATH)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Párhuzamos dolgozók (szálak) száma")
+        parser.add_argument("--requests", type=int, default=25, help="Log beküldések száma dolgozónként")
+        parser.add_argument("--readers", type=int, default=4, help="Párhuzamosan olvasó (oldalt lekérő) szálak")
+        parser.add_argument("--keep", action="store_true", help="A létrehozott logok megtartása")
+
+    def handle(self, *args, **options):
+        memberships = {}
+        for m in ProjectMembership.objects.filter(project__in=Project.objects.active()).select_related("user"):
+            memberships.setdefault(m.user_id, m)
+        memberships = list(memberships.values())[:options["workers"]]
+        if not memberships:
+            raise CommandError("Nincs aktív projekt taggal; futtasd előbb a seed_demo_data parancsot.")
+        self.print_profile()
+
+        started_before = Log.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        lock = threading.Lock()
+        writers_done = threading.Event()
+        timings = {"write": [], "read": []}
+        errors, new_connections = Counter(), Counter()
+
+        def on_connection(sender, connection, **kwargs):
+            with lock:
+                new_connections[threading.get_ident()] += 1
+
+        def request(kind, send, expected_status):
+            start = time.perf_counter()
+            try:
+                response = send()
+                error = None if response.status_code == expected_status else f"HTTP {response.status_code}"
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            # A teszt kliens nem zárja a kapcsolatokat; a valódi kéréskezelő a kérés végén ezt hívja (CONN_MAX_AGE)
+            close_old_connections()
+            with lock:
+                timings[kind].append((time.perf_counter() - start) * 1000)
+                if error:
+                    errors[f"{kind}: {error}"] += 1
+
+        def logged_in(membership):
+            client = Client()
+            client.force_login(membership.user)
+            return client, membership
+
+        def writer(client, membership):
+            url = reverse("new_log", kwargs={"project_id": membership.project_id})
+            try:
+                for _ in range(options["requests"]):
+                    request("write", lambda: client.post(url, {"hours": "1", "comment": "stress"}), 302)
+            finally:
+                connections.close_all()
+
+        def reader(client, membership):
+            urls = [reverse("my_projects"), reverse("project_page", kwargs={"project_id": membership.project_id})]
+            try:
+                while not writers_done.is_set():
+                    for url in urls:
+                        request("read", lambda: client.get(url), 200)
+            finally:
+                connections.close_all()
+
+        # A hibákat összesítve írjuk ki, a kérésenkénti naplózás (traceback, query budget) csak zaj lenne
+        quiet = [logging.getLogger(name) for name in ("django.request", "tracking.query_budget")]
+        for logger in quiet:
+            logger.disabled = True
+        connection_created.connect(on_connection)
+        # A bejelentkezés (session, last_login) írásai még a párhuzamos szakasz előtt lefutnak
+        writers = [threading.Thread(target=writer, args=logged_in(m)) for m in memberships]
+        readers = [
+            threading.Thread(target=reader, args=logged_in(memberships[i % len(memberships)]))
+            for i in range(options["readers"])
+        ]
+        wall = time.perf_counter()
+        for t in writers + readers:
+            t.start()
+        for t in writers:
+            t.join()
+        writers_done.set()
+        for t in readers:
+            t.join()
+        wall = time.perf_counter() - wall
+        connection_created.disconnect(on_connection)
+        for logger in quiet:
+            logger.disabled = False
+
+        for kind, label in (("write", "log beküldés"), ("read", "olvasás")):
+            values = timings[kind]
+            if not values:
+                continue
+            failed = sum(n for error, n in errors.items() if error.startswith(kind))
+            self.stdout.write(
+                f"{label:<13} {len(values) - failed:>5}/{len(values):<5} sikeres, {len(values) / wall:>6.1f} kérés/s, "
+                f"p50 {statistics.median(values):.1f} ms, p95 {percentile(values, 95):.1f} ms"
+            )
+        self.stdout.write(f"{sum(new_connections.values())} új adatbázis kapcsolat, {wall:.1f} s")
+        for error, n in errors.most_common():
+            self.stdout.write(self.style.ERROR(f"  {n}x {error[:200]}"))
+
+        if not options["keep"]:
+            Log.objects.filter(pk__gt=started_before, comment="stress").delete()
+        if errors:
+            raise CommandError(f"{sum(errors.values())} sikertelen beküldés.")
+
+    def print_profile(self):
+        db = settings.DATABASES["default"]
+        with connection.cursor() as cursor:
+            journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+            busy_timeout = cursor.execute("PRAGMA busy_timeout").fetchone()[0]
+        self.stdout.write(
+            f"Profil: {getattr(settings, 'DB_PROFILE', 'default')} – journal_mode={journal_mode}, "
+            f"busy_timeout={busy_timeout} ms, transaction_mode={db.get('OPTIONS', {}).get('transaction_mode', 'DEFERRED')}, "
+            f"CONN_MAX_AGE={db.get('CONN_MAX_AGE', 0)}"
+        )
@@ -0,0 +1,193 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("tracking.query_budget")
+
+QUERY_BUDGET_DEFAULTS = {
+    "MAX_QUERIES": 50,
+    "MAX_DB_MS": 500,
+    "MAX_WALL_MS": 1500,
+    "TOP_FINGERPRINTS": 5,
+    "LOG_FILE": None,
+}
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+
+# Az aktuális kérés mérője; a sync_to_async szálak a kontextus másolatával ugyanezt látják
+_current_recorder = ContextVar("query_budget_recorder", default=None)
+
+
+def query_budget_settings():
+    return {**QUERY_BUDGET_DEFAULTS, **getattr(settings, "QUERY_BUDGET", {})}
+
+
+def percentile(values, pct):
+    """A mérések pct. percentilise (legközelebbi rang; a mérő parancsok közös segédje)"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def fingerprint(sql):
+    """Az SQL literálok és változó hosszú IN listák nélküli alakja, az ismétlődések csoportosításához"""
+    sql = _NUMBERS.sub("?", _STRINGS.sub("?", sql))
+    return _PLACEHOLDER_LISTS.sub("(...)", sql)
+
+
+class QueryRecorder:
+    """connection.execute_wrapper: lekérdezésszám, DB idő és SQL ujjlenyomatok gyűjtése
+
+    keep_queries=True esetén a lekérdezéseket paraméterekkel együtt is megőrzi (audit_query_plans).
+    A beágyazott mérő (pl. a middleware-é egy parancs recording() blokkján belül) a külsőnek is továbbít.
+    """
+
+    def __init__(self, keep_queries=False, parent=None):
+        self.count = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+        self.queries = [] if keep_queries else None
+        self.parent = parent
+        # Async nézetben több szál is futtathat lekérdezést ugyanarra a kérésre
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(sql, params, many, time.perf_counter() - start)
+
+    def add(self, sql, params, many, elapsed):
+        with self.lock:
+            self.db_time += elapsed
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+            if self.queries is not None and not many:
+                self.queries.append((sql, params))
+        if self.parent is not None:
+            self.parent.add(sql, params, many, elapsed)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install(connection):
+    # A lista elejére, hogy a with conn.execute_wrapper(...) blokkok pop()-ja ne ezt vegye le
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _install_on_connect(sender, connection, **kwargs):
+    """A kapcsolatok szálanként jönnek létre (az async ORM szálain is), ezért mindegyikre felkerül a mérő"""
+    _install(connection)
+
+
+connection_created.connect(_install_on_connect)
+
+
+@contextmanager
+def recording(keep_queries=False):
+    """A blokkban futó összes lekérdezés mérése minden kapcsolaton (a sync_to_async szálak kapcsolatain is)
+
+    A CaptureQueriesContext csak az aktuális szál kapcsolatát látja; a mérő parancsok ezt használják.
+    """
+    for conn in connections.all(initialized_only=True):
+        _install(conn)
+    recorder = QueryRecorder(keep_queries=keep_queries, parent=_current_recorder.get())
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+class QueryBudgetMiddleware:
+    """Kérésenként méri a lekérdezések számát, a DB és a teljes időt URL név szerint
+
+    A QUERY_BUDGET beállításban megadott kereteket túllépő kéréseket a leggyakoribb
+    SQL ujjlenyomatokkal naplózza; LOG_FILE esetén minden mérést JSON sorként ment
+    (a query_budget_report parancs ezt összesíti).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        self.record(request, response, recorder, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def __acall__(self, request):
+        recorder, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        self.record(request, response, recorder, (time.perf_counter() - start) * 1000)
+        return response
+
+    def start(self):
+        # A middleware betöltése előtt megnyitott kapcsolatokra a connection_created már nem fut le
+        for conn in connections.all(initialized_only=True):
+            _install(conn)
+        recorder = QueryRecorder(parent=_current_recorder.get())
+        return recorder, _current_recorder.set(recorder), time.perf_counter()
+
+    def record(self, request, response, recorder, wall_ms):
+        budget = query_budget_settings()
+        match = request.resolver_match
+        sample = {
+            "url_name": match.view_name if match else request.path,
+            "method": request.method,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(recorder.db_time * 1000, 2),
+            "wall_ms": round(wall_ms, 2),
+            "at": time.time(),
+        }
+        over_budget = (
+            recorder.count > budget["MAX_QUERIES"]
+            or sample["db_ms"] > budget["MAX_DB_MS"]
+            or wall_ms > budget["MAX_WALL_MS"]
+        )
+        if over_budget:
+            top = [(sql, n) for sql, n in recorder.fingerprints.most_common(budget["TOP_FINGERPRINTS"]) if n > 1]
+            sample["top_fingerprints"] = top
+            logger.warning(
+                "Query budget exceeded: %s %s (%s) – %d queries, %.1f ms DB, %.1f ms total\n%s",
+                request.method, request.path, sample["url_name"], recorder.count, sample["db_ms"], wall_ms,
+                "\n".join(f"  {n}x {sql[:300]}" for sql, n in top),
+            )
+        if budget["LOG_FILE"]:
+            try:
+                with open(budget["LOG_FILE"], "a", encoding="utf-8") as f:
+                    f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+            except OSError:
+                logger.exception("Query budget log file is not writable: %s", budget["LOG_FILE"])
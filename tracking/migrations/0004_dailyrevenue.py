@@ -0,0 +1,59 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_daily_revenue(apps, schema_editor):
+    Project = apps.get_model("tracking", "Project")
+    Log = apps.get_model("tracking", "Log")
+    DailyRevenue = apps.get_model("tracking", "DailyRevenue")
+    rows = list(
+        Log.objects.annotate(day=TruncDate("date"))
+        .values("project_id", "day")
+        .annotate(hours=Sum("hours"))
+        .order_by()
+    )
+    totals = {}
+    for row in rows:
+        totals[row["project_id"]] = totals.get(row["project_id"], 0) + row["hours"]
+    projects = {p.pk: p for p in Project.objects.filter(pk__in=totals)}
+    entries = []
+    for row in rows:
+        project = projects[row["project_id"]]
+        revenue = 0
+        if project.is_completed and totals[project.pk]:
+            revenue = round(row["hours"] / totals[project.pk] * project.revenue, 2)
+        entries.append(DailyRevenue(project=project, day=row["day"], hours=row["hours"], revenue=revenue))
+    DailyRevenue.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracking", "0003_project_role_limits_and_pay"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRevenue",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(db_index=True)),
+                ("hours", models.DecimalField(decimal_places=1, default=0, max_digits=8)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_revenue",
+                        to="tracking.project",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("project", "day")},
+            },
+        ),
+        migrations.RunPython(fill_daily_revenue, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Project = apps.get_model("tracking", "Project")
+    VideoTitle = apps.get_model("tracking", "VideoTitle")
+    Log = apps.get_model("tracking", "Log")
+
+    def title_count(**filters):
+        return Coalesce(Subquery(
+            VideoTitle.objects.filter(project=OuterRef("pk"), **filters)
+            .values("project").annotate(c=Count("pk")).values("c")
+        ), 0)
+
+    Project.objects.update(
+        video_title_count=title_count(),
+        raw_uploaded_count=title_count(raw_uploaded=True),
+        editing_done_count=title_count(editing_done=True),
+        logged_hours=Coalesce(Subquery(
+            Log.objects.filter(project=OuterRef("pk"))
+            .values("project").annotate(t=Sum("hours")).values("t")
+        ), Value(0), output_field=models.DecimalField(max_digits=9, decimal_places=1)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracking", "0004_dailyrevenue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="video_title_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="raw_uploaded_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="editing_done_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="logged_hours",
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=9),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
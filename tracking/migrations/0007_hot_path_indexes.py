@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracking", "0005_project_progress_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(fields=["date"], name="expense_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["project", "user", "date"], name="log_project_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["user", "date"], name="log_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="projectmembership",
+            index=models.Index(fields=["project", "user"], name="membership_project_user_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="videotitle",
+            index=models.Index(fields=["project", "raw_uploaded", "editing_done"], name="videotitle_progress_idx"),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def fill_work_date(apps, schema_editor):
+    # TruncDate a TIME_ZONE szerinti helyi napot adja, egy UPDATE-tel
+    Log = apps.get_model("tracking", "Log")
+    Log.objects.update(work_date=TruncDate("date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracking", "0007_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="log",
+            name="work_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_work_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="log",
+            name="work_date",
+            field=models.DateField(editable=False),
+        ),
+        migrations.RemoveIndex(
+            model_name="log",
+            name="log_user_date_idx",
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["user", "work_date"], name="log_user_work_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["project", "work_date"], name="log_project_work_date_idx"),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracking", "0008_log_work_date"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["work_date"], name="log_work_date_idx"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_completed_at(apps, schema_editor):
+    # A lezárás ideje eddig nem volt tárolva: a projekt utolsó logja a legjobb közelítés
+    Project = apps.get_model("tracking", "Project")
+    Log = apps.get_model("tracking", "Log")
+    last_log = Log.objects.filter(project=OuterRef("pk")).values("project").annotate(last=Max("date")).values("last")
+    Project.objects.filter(is_completed=True).update(completed_at=Coalesce(Subquery(last_log), F("created_at")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracking", "0009_log_work_date_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="completed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_completed_at, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
-from django.db.models import Sum
+from datetime import date
+from django.db.models import (
+    Sum, Count, Q, F, OuterRef, Subquery, Exists, Value, Case, When, ExpressionWrapper,
+    BooleanField, DateField, Window,
+)
+from django.db.models.functions import Coalesce, Greatest, NullIf, RowNumber
 
 
 class CustomUser(AbstractUser):
@@ -23,12 +28,132 @@ class CustomUser(AbstractUser):
         return f"{self.get_full_name() or self.username} ({self.get_job_role_display_hu()})"
 
 
+def _latest_date(*fields):
+    """A megadott dátum mezők közül a legkésőbbi, NULL-okat kihagyva (mint a max(deadlines))"""
+    never = Value(date.min, output_field=DateField())
+    return NullIf(Greatest(*(Coalesce(f, never) for f in fields)), never)
+
+
+def _percent(done, total):
+    if total == 0:
+        return 0
+    return min(int((done / total) * 100), 100)
+
+
+def _title_progress(done_field, total_field):
+    """Videó cím alapú készültség a projekt számlálóiból (nincs lekérdezés)"""
+    def strategy(user, projects):
+        return {p.pk: _percent(getattr(p, done_field), getattr(p, total_field)) for p in projects}
+    return strategy
+
+
+def _photo_progress(user, projects):
+    """Fotós készültség: a legutolsó log mindkét lépése kész-e (egy lekérdezés)"""
+    latest = PhotoLogProgress.latest_by_member([p.pk for p in projects], [user.pk])
+    result = {}
+    for p in projects:
+        progress = latest.get((p.pk, user.pk))
+        result[p.pk] = 100 if progress and progress.is_done else 0
+    return result
+
+
+COMPLETION_STRATEGIES = {
+    'iro': _title_progress('video_title_count', 'required_video_count'),
+    'videos': _title_progress('raw_uploaded_count', 'video_title_count'),
+    'vago': _title_progress('editing_done_count', 'video_title_count'),
+    'fotos': _photo_progress,
+}
+
+
+def _expiry_deadline():
+    """Az is_expired által figyelt határidők maximuma a projekt típusa szerint"""
+    return Case(
+        When(project_type='video', then=_latest_date('editor_deadline', 'writer_deadline')),
+        When(project_type='photo', then=F('photo_editing_deadline')),
+        default=_latest_date('editor_deadline', 'writer_deadline', 'photo_editing_deadline'),
+        output_field=DateField(),
+    )
+
+
+def _expired_q():
+    return Q(expiry_deadline__isnull=False, expiry_deadline__lt=timezone.now().date())
+
+
+class ProjectQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Listaoldalakhoz: órák, főhatáridő, lejárt és boss-kész státusz SQL-ben számolva"""
+        videos_done = Q(project_type='photo') | Q(
+            required_video_count__gt=0,
+            video_title_count__gt=0,
+            video_title_count__gte=F('required_video_count'),
+            raw_uploaded_count=F('video_title_count'),
+            editing_done_count=F('video_title_count'),
+        )
+        photographers = ProjectMembership.objects.filter(project=OuterRef('pk'), user__job_role='fotos')
+        latest_log = Log.objects.filter(
+            project_id=OuterRef('project_id'), user_id=OuterRef('user_id')
+        ).order_by('-date', '-pk').values('pk')[:1]
+        photographer_pending = photographers.annotate(latest_log=Subquery(latest_log)).exclude(
+            Exists(PhotoLogProgress.objects.filter(log_id=OuterRef('latest_log'), fieldwork_done=True, editing_done=True))
+        )
+        photos_done = Q(project_type='video') | (Exists(photographers) & ~Exists(photographer_pending))
+        return self.alias(expiry_deadline=_expiry_deadline()).annotate(
+            total_hours=F('logged_hours'),
+            deadline=_latest_date('editor_deadline', 'writer_deadline', 'photo_editing_deadline'),
+            expired=ExpressionWrapper(_expired_q(), output_field=BooleanField()),
+            boss_done=ExpressionWrapper(videos_done & photos_done, output_field=BooleanField()),
+        )
+
+    def active(self):
+        """Nem lezárt és nem lejárt projektek (is_active SQL-ben)"""
+        return self.filter(is_completed=False).alias(expiry_deadline=_expiry_deadline()).exclude(_expired_q())
+
+    def available_for(self, user):
+        """Projektek, amelyekre a felhasználó jelentkezhet (new_project_signup_view szabályai SQL-ben)"""
+        if user.job_role in ('videos', 'iro', 'vago'):
+            types, date_field = ('video', 'both'), 'videographer_date'
+        elif user.job_role == 'fotos':
+            types, date_field = ('photo', 'both'), 'photo_onsite_date'
+        else:
+            return self.none()
+        # A saját projektjeinek forgatási / fotózási napjai foglaltak
+        my_projects = Project.objects.filter(memberships__user=user)
+        occupied = Q(**{f'{date_field}__in': my_projects.filter(videographer_date__isnull=False).values('videographer_date')}) | Q(
+            **{f'{date_field}__in': my_projects.filter(photo_onsite_date__isnull=False).values('photo_onsite_date')}
+        )
+        slots_taken = Coalesce(Subquery(
+            ProjectMembership.objects.filter(project=OuterRef('pk'), user__job_role=user.job_role)
+            .values('project').annotate(c=Count('pk')).values('c')
+        ), 0)
+        return (
+            self.active()
+            .filter(project_type__in=types)
+            .exclude(memberships__user=user)
+            .alias(slots_taken=slots_taken)
+            .filter(Q(**{f'{date_field}__isnull': True}) | ~occupied)
+            .filter(slots_taken__lt=F(Project.ROLE_MAX_FIELDS[user.job_role]))
+        )
+
+
 class Project(models.Model):
     PROJECT_TYPES = [
         ('video', 'Videós projekt'),
         ('photo', 'Fotós projekt'),
         ('both', 'Mindkettő'),
     ]
+    ROLE_MAX_FIELDS = {
+        'iro': 'max_writer_count',
+        'fotos': 'max_photographer_count',
+        'videos': 'max_videographer_count',
+        'vago': 'max_editor_count',
+    }
+    ROLE_PAY_FIELDS = {
+        'iro': 'pay_writer',
+        'fotos': 'pay_photographer',
+        'videos': 'pay_videographer',
+        'vago': 'pay_editor',
+    }
+
     title = models.CharField(max_length=255)
     company = models.CharField(max_length=255)
     revenue = models.DecimalField(max_digits=12, decimal_places=0, default=0)
@@ -56,13 +181,53 @@ class Project(models.Model):
     onsite_hours = models.PositiveIntegerField(default=0)
     total_hours_expected = models.PositiveIntegerField(default=0)
 
+    # Denormalizált számlálók, a new_log_view és a törlések tartják karban (rebuild_project_counters javítja)
+    video_title_count = models.PositiveIntegerField(default=0)
+    raw_uploaded_count = models.PositiveIntegerField(default=0)
+    editing_done_count = models.PositiveIntegerField(default=0)
+    logged_hours = models.DecimalField(max_digits=9, decimal_places=1, default=0)
+
     is_completed = models.BooleanField(default=False)
+    # A lezárás időpontja; a bérjegyzék ebben a hónapban számolja el a tagok díját
+    completed_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
         'CustomUser', on_delete=models.SET_NULL, null=True, blank=True,
         related_name='created_projects'
     )
 
+    objects = ProjectQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_ledger_state = instance.ledger_state()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or {'revenue', 'is_completed'} <= set(fields):
+            self._saved_ledger_state = self.ledger_state()
+
+    def ledger_state(self):
+        """A bevételi naplót meghatározó mezők (bevétel, lezárás); None, ha nincsenek betöltve"""
+        if {'revenue', 'is_completed'} & self.get_deferred_fields():
+            return None
+        return self.revenue, self.is_completed
+
+    def save(self, *args, **kwargs):
+        # A lezárás ideje a lezárással együtt áll be, újranyitáskor törlődik (bármelyik nézetből vagy adminból)
+        if 'is_completed' not in self.get_deferred_fields():
+            completed_at = self.completed_at
+            if self.is_completed and not completed_at:
+                self.completed_at = timezone.now()
+            elif not self.is_completed:
+                self.completed_at = None
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and self.completed_at != completed_at:
+                kwargs['update_fields'] = {*update_fields, 'completed_at'}
+        super().save(*args, **kwargs)
+
     @property
     def is_expired(self):
         today = timezone.now().date()
@@ -86,54 +251,49 @@ class Project(models.Model):
         if self.photo_editing_deadline: deadlines.append(self.photo_editing_deadline)
         return max(deadlines) if deadlines else None
 
+    @staticmethod
+    def counter_expressions():
+        """A számlálók a VideoTitle és Log táblákból számolva (update()-hez)"""
+        def title_count(**filters):
+            return Coalesce(Subquery(
+                VideoTitle.objects.filter(project=OuterRef('pk'), **filters)
+                .values('project').annotate(c=Count('pk')).values('c')
+            ), 0)
+        return {
+            'video_title_count': title_count(),
+            'raw_uploaded_count': title_count(raw_uploaded=True),
+            'editing_done_count': title_count(editing_done=True),
+            'logged_hours': Coalesce(Subquery(
+                Log.objects.filter(project=OuterRef('pk'))
+                .values('project').annotate(t=Sum('hours')).values('t')
+            ), Value(0), output_field=models.DecimalField(max_digits=9, decimal_places=1)),
+        }
+
     def total_logged_hours(self):
-        return self.logs.aggregate(total=Sum('hours'))['total'] or 0
+        return self.logged_hours
 
     def user_logged_hours(self, user):
         return self.logs.filter(user=user).aggregate(total=Sum('hours'))['total'] or 0
 
     def completion_percentage_for_user(self, user):
-        if user.job_role == 'iro':
-            total = self.required_video_count
-            if total == 0:
-                return 0
-            done = self.video_titles.count()
-            return min(int((done / total) * 100), 100)
-        if user.job_role == 'videos':
-            total = self.video_titles.count()
-            if total == 0:
-                return 0
-            done = self.video_titles.filter(raw_uploaded=True).count()
-            return min(int((done / total) * 100), 100)
-        if user.job_role == 'vago':
-            total = self.video_titles.count()
-            if total == 0:
-                return 0
-            done = self.video_titles.filter(editing_done=True).count()
-            return min(int((done / total) * 100), 100)
-        if user.job_role == 'fotos':
-            last_log = self.logs.filter(user=user).order_by('-date').first()
-            if not last_log or not hasattr(last_log, 'photo_progress'):
-                return 0
-            p = last_log.photo_progress
-            return 100 if (p.fieldwork_done and p.editing_done) else 0
-        return 0
+        return Project.completion_percentages(user, [self])[self.pk]
+
+    @staticmethod
+    def completion_percentages(user, projects):
+        """A felhasználó készültsége több projekten egyszerre ({project_id: %}), munkakörönkénti stratégiával"""
+        projects = list(projects)
+        strategy = COMPLETION_STRATEGIES.get(user.job_role)
+        if strategy is None or not projects:
+            return {p.pk: 0 for p in projects}
+        return strategy(user, projects)
 
     def role_max_for(self, role):
-        return {
-            'iro': self.max_writer_count,
-            'fotos': self.max_photographer_count,
-            'videos': self.max_videographer_count,
-            'vago': self.max_editor_count,
-        }.get(role, 0)
+        field = self.ROLE_MAX_FIELDS.get(role)
+        return getattr(self, field) if field else 0
 
     def role_pay_for(self, role):
-        return {
-            'iro': self.pay_writer,
-            'fotos': self.pay_photographer,
-            'videos': self.pay_videographer,
-            'vago': self.pay_editor,
-        }.get(role, 0)
+        field = self.ROLE_PAY_FIELDS.get(role)
+        return getattr(self, field) if field else 0
 
     def role_slots_taken(self, role):
         return self.memberships.filter(user__job_role=role).count()
@@ -147,23 +307,21 @@ class Project(models.Model):
             return True
         if self.required_video_count <= 0:
             return False
-        return self.video_titles.count() >= self.required_video_count
+        return self.video_title_count >= self.required_video_count
 
     def is_videographer_team_done(self):
         if self.project_type not in ('video', 'both'):
             return True
-        total = self.video_titles.count()
-        if total == 0:
+        if self.video_title_count == 0:
             return False
-        return self.video_titles.filter(raw_uploaded=True).count() == total
+        return self.raw_uploaded_count == self.video_title_count
 
     def is_editor_team_done(self):
         if self.project_type not in ('video', 'both'):
             return True
-        total = self.video_titles.count()
-        if total == 0:
+        if self.video_title_count == 0:
             return False
-        return self.video_titles.filter(editing_done=True).count() == total
+        return self.editing_done_count == self.video_title_count
 
     def is_boss_done_videos(self):
         """Boss jelzés: összes video_title kiyomva-e a vágó által"""
@@ -180,18 +338,12 @@ class Project(models.Model):
         if self.project_type not in ('photo', 'both'):
             return True  # Ha nincs fotó, akkor "done" ebből a szempontból
         
-        # Meg kell nézni az összes fotónál a logok photo_progress-t
-        photo_users = CustomUser.objects.filter(memberships__project=self, job_role='fotos').distinct()
-        if not photo_users.exists():
+        # Meg kell nézni az összes fotónál a legutolsó log photo_progress-ét
+        photo_user_ids = list(self.memberships.filter(user__job_role='fotos').values_list('user_id', flat=True))
+        if not photo_user_ids:
             return False
-        for user in photo_users:
-            last_log = self.logs.filter(user=user).order_by('-date').first()
-            if not last_log or not hasattr(last_log, 'photo_progress'):
-                return False
-            p = last_log.photo_progress
-            if not (p.fieldwork_done and p.editing_done):
-                return False
-        return True
+        latest = PhotoLogProgress.latest_by_member([self.pk], photo_user_ids)
+        return all(latest.get((self.pk, uid)) and latest[(self.pk, uid)].is_done for uid in photo_user_ids)
 
     def is_boss_done(self):
         """Boss jelzés: a projekt végzett-e (videó és/vagy fotó feltételei teljesültek)"""
@@ -214,6 +366,10 @@ class ProjectMembership(models.Model):
 
     class Meta:
         unique_together = ('user', 'project')
+        indexes = [
+            # Projekt tagjai (szerepkör szerint a felhasználó táblából) a projekt felől
+            models.Index(fields=['project', 'user'], name='membership_project_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} @ {self.project}"
@@ -233,6 +389,11 @@ class VideoTitle(models.Model):
     editing_done_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='edited_titles')
     editing_done_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'raw_uploaded', 'editing_done'], name='videotitle_progress_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.project.title})"
 
@@ -241,9 +402,28 @@ class Log(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='logs')
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='logs')
     date = models.DateTimeField(auto_now_add=True)
+    # A date helyi (TIME_ZONE) napja, mentéskor töltődik; a napi / havi riportok ezen indexelt tartományt olvasnak
+    work_date = models.DateField(editable=False)
     hours = models.DecimalField(max_digits=5, decimal_places=1)
     comment = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'user', 'date'], name='log_project_user_date_idx'),
+            models.Index(fields=['user', 'work_date'], name='log_user_work_date_idx'),
+            models.Index(fields=['project', 'work_date'], name='log_project_work_date_idx'),
+            # Időszakos export az összes dolgozóra, nap szerint rendezve
+            models.Index(fields=['work_date'], name='log_work_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.work_date = timezone.localdate(self.date or timezone.now())
+        super().save(*args, **kwargs)
+        # Új lognál az auto_now_add csak most állította be a date-et; éjfélkor a nap eltérhet
+        if self.work_date != timezone.localdate(self.date):
+            self.work_date = timezone.localdate(self.date)
+            Log.objects.filter(pk=self.pk).update(work_date=self.work_date)
+
     def __str__(self):
         return f"Log: {self.user} @ {self.project} – {self.hours}h"
 
@@ -262,6 +442,26 @@ class PhotoLogProgress(models.Model):
     fieldwork_done = models.BooleanField(default=False)
     editing_done = models.BooleanField(default=False)
 
+    @property
+    def is_done(self):
+        return self.fieldwork_done and self.editing_done
+
+    @classmethod
+    def latest_by_member(cls, project_ids, user_ids=None):
+        """Projekt-felhasználó páronként a legutolsó log photo_progress-e egy lekérdezéssel
+
+        {(project_id, user_id): PhotoLogProgress vagy None}; akinek nincs logja, az kimarad.
+        """
+        logs = Log.objects.filter(project_id__in=project_ids)
+        if user_ids is not None:
+            logs = logs.filter(user_id__in=user_ids)
+        latest = logs.annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('project_id'), F('user_id')],
+            order_by=[F('date').desc(), F('pk').desc()],
+        )).filter(rank=1).select_related('photo_progress')
+        return {(log.project_id, log.user_id): getattr(log, 'photo_progress', None) for log in latest}
+
     def __str__(self):
         return f"Photo progress for log {self.log.id}"
 
@@ -275,5 +475,24 @@ class Expense(models.Model):
         related_name='created_expenses'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], name='expense_date_idx'),
+        ]
+
     def __str__(self):
         return f"Kiadás: {self.amount} Ft - {self.description}"
+
+
+class DailyRevenue(models.Model):
+    """Napi bevételi napló: projektenként és naponként a logolt órák és a lezárt projekt arányos bevétele"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_revenue')
+    day = models.DateField(db_index=True)
+    hours = models.DecimalField(max_digits=8, decimal_places=1, default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('project', 'day')
+
+    def __str__(self):
+        return f"{self.project} – {self.day}: {self.revenue} Ft"
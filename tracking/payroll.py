@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+
+from .models import CustomUser, Log, Project, ProjectMembership
+from .revenue import month_bounds
+
+# A bérsorok dolgozó és projekt adatai (Log és ProjectMembership felől is ugyanezek az útvonalak)
+LINE_FIELDS = (
+    "user_id", "user__username", "user__first_name", "user__last_name", "user__job_role",
+    "project_id", "project__title", "project__company",
+)
+
+
+def role_pay_expression():
+    """Project.role_pay_for() SQL kifejezésként: a dolgozó szerepkörének díja az adott projekten"""
+    return Case(
+        *[When(user__job_role=role, then=F(f"project__{field}")) for role, field in Project.ROLE_PAY_FIELDS.items()],
+        default=Value(0), output_field=DecimalField(max_digits=12, decimal_places=0),
+    )
+
+
+def _member_hours(logs, start, end, fields=("user_id", "project_id"), **expressions):
+    """(dolgozó, projekt) páronként a hónap és az összes logolt óra egy csoportosító lekérdezéssel"""
+    return (
+        logs.values(*fields, **expressions)
+        .annotate(month_hours=Sum("hours", filter=Q(work_date__range=(start, end))), total_hours=Sum("hours"))
+        .order_by()
+    )
+
+
+def payroll_lines(year, month, prorate=False):
+    """A hónap bérsorai (dolgozó × projekt) a teljes cégre, fix számú lekérdezéssel
+
+    Alapesetben a hónapban lezárt projektek tagjai a szerepkörük teljes díját kapják. prorate=True esetén
+    a díj a dolgozó projekten logolt óráinak arányában oszlik el a hónapok között; folyamatban lévő
+    projektnél a korábbi hónapok összege a további logokkal még változik.
+    """
+    start, end = month_bounds(year, month)
+    if prorate:
+        projects = Log.objects.filter(work_date__range=(start, end)).values("project_id")
+        rows = list(
+            _member_hours(Log.objects.filter(project_id__in=projects), start, end, LINE_FIELDS, pay=role_pay_expression())
+            .filter(month_hours__gt=0)
+        )
+    else:
+        # Allekérdezés a (kevés) lezárt projektre, így a logok és tagságok projekt indexen olvasódnak
+        projects = Project.objects.filter(completed_at__date__range=(start, end)).values("pk")
+        hours = {
+            (row["user_id"], row["project_id"]): row
+            for row in _member_hours(Log.objects.filter(project_id__in=projects), start, end)
+        }
+        rows = list(
+            ProjectMembership.objects.filter(project_id__in=projects)
+            .values(*LINE_FIELDS, pay=role_pay_expression()).order_by()
+        )
+        for row in rows:
+            row.update(hours.get((row["user_id"], row["project_id"]), {}))
+
+    roles = dict(CustomUser.JOB_ROLES)
+    lines = []
+    for row in rows:
+        month_hours, total_hours = row.get("month_hours") or Decimal(0), row.get("total_hours") or Decimal(0)
+        if prorate:
+            amount = (row["pay"] * month_hours / total_hours).quantize(Decimal(1)) if total_hours else Decimal(0)
+        else:
+            amount = row["pay"]
+        if not amount:
+            continue
+        lines.append({
+            "user_id": row["user_id"], "username": row["user__username"],
+            "name": f"{row['user__first_name']} {row['user__last_name']}".strip() or row["user__username"],
+            "role": roles.get(row["user__job_role"], "-"),
+            "project_id": row["project_id"], "project": row["project__title"], "company": row["project__company"],
+            "pay": row["pay"], "month_hours": month_hours, "total_hours": total_hours, "amount": amount,
+        })
+    lines.sort(key=lambda line: (line["name"], line["user_id"], line["project"], line["project_id"]))
+    return lines
+
+
+def monthly_payroll(year, month, prorate=False):
+    """Dolgozónként összesített bérjegyzék ({"name", "role", "lines", "month_hours", "total"}), név szerint"""
+    employees = {}
+    for line in payroll_lines(year, month, prorate):
+        employee = employees.setdefault(line["user_id"], {
+            "user_id": line["user_id"], "username": line["username"], "name": line["name"], "role": line["role"],
+            "lines": [], "month_hours": Decimal(0), "total": Decimal(0),
+        })
+        employee["lines"].append(line)
+        employee["month_hours"] += line["month_hours"]
+        employee["total"] += line["amount"]
+    return list(employees.values())
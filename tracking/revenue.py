@@ -0,0 +1,153 @@
+from calendar import monthrange
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractYear, ExtractMonth
+
+from .models import Log, Project, Expense, DailyRevenue
+
+
+def _ledger_entries(projects):
+    """A projektek napi napló sorai közvetlenül a logokból számolva"""
+    rows = list(
+        Log.objects.filter(project__in=projects)
+        .values("project_id", day=F("work_date"))
+        .annotate(hours=Sum("hours"))
+        .order_by()
+    )
+    totals = {}
+    for row in rows:
+        totals[row["project_id"]] = totals.get(row["project_id"], 0) + row["hours"]
+    meta = {pk: (rev, done) for pk, rev, done in projects.values_list("pk", "revenue", "is_completed")}
+    for row in rows:
+        project_revenue, is_completed = meta[row["project_id"]]
+        revenue = Decimal(0)
+        if is_completed and totals[row["project_id"]]:
+            revenue = round(row["hours"] / totals[row["project_id"]] * project_revenue, 2)
+        yield DailyRevenue(project_id=row["project_id"], day=row["day"], hours=row["hours"], revenue=revenue)
+
+
+def refresh_ledger(project_ids):
+    """A megadott projektek napló sorainak újraszámolása (bevétel vagy lezárás változásakor)"""
+    with transaction.atomic():
+        DailyRevenue.objects.filter(project_id__in=project_ids).delete()
+        DailyRevenue.objects.bulk_create(_ledger_entries(Project.objects.filter(pk__in=project_ids)), batch_size=1000)
+
+
+def rebuild_ledger():
+    """A teljes napló újraépítése a logokból"""
+    with transaction.atomic():
+        DailyRevenue.objects.all().delete()
+        DailyRevenue.objects.bulk_create(_ledger_entries(Project.objects.all()), batch_size=1000)
+    return DailyRevenue.objects.count()
+
+
+def ledger_add_log(log):
+    """Új log beírása a naplóba: a napi óraszám nő, lezárt projektnél az arányok is újraszámolódnak"""
+    if log.project.is_completed:
+        refresh_ledger([log.project_id])
+        return
+    day = log.work_date
+    with transaction.atomic():
+        updated = DailyRevenue.objects.filter(project_id=log.project_id, day=day).update(hours=F("hours") + log.hours)
+        if not updated:
+            DailyRevenue.objects.create(project_id=log.project_id, day=day, hours=log.hours)
+
+
+def ledger_remove_log(log):
+    """Törölt log kivezetése: a napi óraszám csökken (az üres nap törlődik), lezárt projektnél újraszámolás"""
+    if Project.objects.filter(pk=log.project_id, is_completed=True).exists():
+        refresh_ledger([log.project_id])
+        return
+    day_rows = DailyRevenue.objects.filter(project_id=log.project_id, day=log.work_date)
+    with transaction.atomic():
+        day_rows.update(hours=F("hours") - log.hours)
+        day_rows.filter(hours__lte=0).delete()
+
+
+def attributed_revenue_by_day(start, end):
+    """Lezárt projektek bevétele napokra osztva a logolt órák arányában ({nap: Ft})"""
+    rows = DailyRevenue.objects.filter(day__range=(start, end), revenue__gt=0).values("day").annotate(total=Sum("revenue"))
+    return {r["day"]: float(r["total"]) for r in rows}
+
+
+def expenses_by_day(start, end):
+    """Kiadások napokra összesítve ({nap: Ft})"""
+    rows = Expense.objects.filter(date__range=(start, end)).values("date").annotate(total=Sum("amount"))
+    return {r["date"]: float(r["total"]) for r in rows}
+
+
+def month_bounds(year, month):
+    _, days = monthrange(year, month)
+    return date(year, month, 1), date(year, month, days)
+
+
+def daily_series(values_by_day, year, month):
+    """{nap: érték} szótárból a diagramok {"labels", "values"} formátuma"""
+    start, end = month_bounds(year, month)
+    labels, values = [], []
+    for day in range(1, end.day + 1):
+        labels.append(f"{day}.")
+        values.append(round(values_by_day.get(date(year, month, day), 0)))
+    return {"labels": labels, "values": values}
+
+
+def monthly_revenue_series(year, month):
+    return daily_series(attributed_revenue_by_day(*month_bounds(year, month)), year, month)
+
+
+def monthly_profit_series(year, month):
+    start, end = month_bounds(year, month)
+    revenue = attributed_revenue_by_day(start, end)
+    expenses = expenses_by_day(start, end)
+    profit = {d: revenue.get(d, 0) - expenses.get(d, 0) for d in set(revenue) | set(expenses)}
+    return daily_series(profit, year, month)
+
+
+def employee_revenue(year, month):
+    """Dolgozónként a hónap órái és a hozzájuk rendelt bevétel ({user_id: {"hours", "revenue", "projects"}})
+
+    Egy projekt bevételéből a dolgozó a hónapban logolt óráinak a projekt összes órájához mért arányát kapja;
+    a teljes cégre két csoportosító lekérdezéssel.
+    """
+    month_logs = Log.objects.filter(work_date__range=month_bounds(year, month))
+    project_hours = dict(
+        Log.objects.filter(project_id__in=month_logs.values("project_id"))
+        .values("project_id").annotate(total=Sum("hours")).order_by()
+        .values_list("project_id", "total")
+    )
+    result = {}
+    for row in month_logs.values("user_id", "project_id", "project__revenue").annotate(hours=Sum("hours")).order_by():
+        entry = result.setdefault(row["user_id"], {"hours": Decimal(0), "revenue": 0.0, "projects": 0})
+        entry["hours"] += row["hours"]
+        entry["projects"] += 1
+        total = project_hours[row["project_id"]]
+        if total > 0:
+            entry["revenue"] += float(row["hours"]) / float(total) * float(row["project__revenue"])
+    for entry in result.values():
+        entry["revenue"] = round(entry["revenue"])
+    return result
+
+
+def monthly_totals(years):
+    """Bevétel és kiadás havonta a megadott évekre ({(év, hó): {"revenue", "expenses"}}), forrásonként egy lekérdezéssel"""
+    years = sorted(set(years))
+    start, end = date(years[0], 1, 1), date(years[-1], 12, 31)
+    totals = {(y, m): {"revenue": 0.0, "expenses": 0.0} for y in years for m in range(1, 13)}
+    sources = (
+        ("revenue", DailyRevenue.objects.filter(day__range=(start, end)), "day", "revenue"),
+        ("expenses", Expense.objects.filter(date__range=(start, end)), "date", "amount"),
+    )
+    for key, qs, date_field, amount_field in sources:
+        rows = (
+            qs.annotate(y=ExtractYear(date_field), m=ExtractMonth(date_field))
+            .values("y", "m")
+            .annotate(total=Sum(amount_field))
+            .order_by()
+        )
+        for row in rows:
+            if (row["y"], row["m"]) in totals:
+                totals[(row["y"], row["m"])][key] = float(row["total"])
+    return totals
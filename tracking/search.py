@@ -0,0 +1,96 @@
+import threading
+import time
+import unicodedata
+
+from .models import CustomUser
+
+
+def fold(text):
+    """Ékezetek nélküli, kisbetűs alak: "Áron" -> "aron" """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EmployeeIndex:
+    """Folyamaton belüli keresőindex az aktív dolgozókra (employee_autocomplete)
+
+    A felhasználók mentése / törlése érvényteleníti (signals.py); a TTL a más
+    folyamatokban történt módosítások miatt korlátozza az elavulást.
+    """
+    TTL = 60
+    FUZZY_THRESHOLD = 0.3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None
+        self._trigram_map = {}
+        self._built_at = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = None
+
+    def _build(self):
+        entries, trigram_map = [], {}
+        users = CustomUser.objects.filter(is_active=True).only("pk", "first_name", "last_name", "username", "job_role")
+        for user in users.order_by("last_name", "first_name", "username"):
+            tokens = [fold(t) for t in (user.first_name, user.last_name, user.username) if t]
+            tokens += [w for t in tokens for w in t.split() if w != t]
+            entry = {
+                "id": user.pk,
+                "name": user.get_full_name() or user.username,
+                "role": user.get_job_role_display_hu(),
+                "tokens": tokens,
+            }
+            for tri in set().union(*(trigrams(t) for t in tokens)):
+                trigram_map.setdefault(tri, set()).add(len(entries))
+            entries.append(entry)
+        return entries, trigram_map
+
+    def _snapshot(self):
+        with self._lock:
+            if self._entries is None or time.monotonic() - self._built_at > self.TTL:
+                self._entries, self._trigram_map = self._build()
+                self._built_at = time.monotonic()
+            return self._entries, self._trigram_map
+
+    def _score(self, word, tokens):
+        """Kisebb a jobb: 0 pontos egyezés, 1 szó eleje, 2 részlet, 3+ trigram hasonlóság, None nincs találat"""
+        if word in tokens:
+            return 0
+        if any(t.startswith(word) for t in tokens):
+            return 1
+        if any(word in t for t in tokens):
+            return 2
+        if len(word) >= 3:
+            query_tris = trigrams(word)
+            best = max(len(query_tris & trigrams(t)) / len(query_tris | trigrams(t)) for t in tokens)
+            if best >= self.FUZZY_THRESHOLD:
+                return 4 - best
+        return None
+
+    def search(self, query, limit=10):
+        words = fold(query).split()
+        if not words:
+            return []
+        entries, trigram_map = self._snapshot()
+        # Hosszabb szavaknál csak a közös trigrammal rendelkező dolgozókat kell pontozni
+        candidates = range(len(entries))
+        longest = max(words, key=len)
+        if len(longest) >= 3:
+            candidates = sorted(set().union(*(trigram_map.get(t, set()) for t in trigrams(longest))))
+        ranked = []
+        for i in candidates:
+            scores = [self._score(w, entries[i]["tokens"]) for w in words]
+            if None not in scores:
+                ranked.append((sum(scores), i))
+        ranked.sort()
+        return [{k: entries[i][k] for k in ("id", "name", "role")} for _, i in ranked[:limit]]
+
+
+employee_index = EmployeeIndex()
@@ -0,0 +1,190 @@
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .finance_cache import completed_project_months, invalidate_months, project_months
+from .models import CustomUser, Project, Log, VideoTitle, Expense
+from .revenue import ledger_add_log, ledger_remove_log, refresh_ledger
+from .search import employee_index
+
+
+def _invalidate_on_commit(months):
+    """A tranzakció végén (a napló frissítése után) érvényteleníti a hónapok pénzügyi cache-ét"""
+    if months:
+        transaction.on_commit(lambda: invalidate_months(months))
+
+
+def _origin_model(origin):
+    """A törlést indító modell (obj.delete() és queryset.delete() esetén is)"""
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin) if origin is not None else None
+
+
+@receiver(post_delete, sender=Log)
+def log_deleted(sender, instance, origin=None, **kwargs):
+    """Törölt log óráinak levonása a projekt számlálójából"""
+    if _origin_model(origin) in (Project, CustomUser):
+        return  # a projekt törlődik, ill. a dolgozó törlése egyszer számolja újra a számlálókat
+    Project.objects.filter(pk=instance.project_id).update(
+        logged_hours=Greatest(F("logged_hours") - instance.hours, Value(0))
+    )
+
+
+def _title_counters(raw_uploaded, editing_done, step):
+    """Egy videó cím hozzájárulása a projekt számlálóihoz (step=1 hozzáadás, -1 levonás)"""
+    fields = ["video_title_count"]
+    if raw_uploaded:
+        fields.append("raw_uploaded_count")
+    if editing_done:
+        fields.append("editing_done_count")
+    return {field: Greatest(F(field) + step, Value(0)) for field in fields}
+
+
+@receiver(post_delete, sender=VideoTitle)
+def video_title_deleted(sender, instance, origin=None, **kwargs):
+    """Törölt videó cím levonása a projekt számlálóiból"""
+    if _origin_model(origin) is Project:
+        return
+    Project.objects.filter(pk=instance.project_id).update(
+        **_title_counters(instance.raw_uploaded, instance.editing_done, -1)
+    )
+
+
+@receiver(pre_save, sender=VideoTitle)
+def video_title_changing(sender, instance, raw=False, **kwargs):
+    # A módosított cím korábbi projektje és állapota (pl. adminban pipált leforgatva / megvágva)
+    if not raw and not instance._state.adding:
+        instance._previous = (
+            VideoTitle.objects.filter(pk=instance.pk).values_list("project_id", "raw_uploaded", "editing_done").first()
+        )
+
+
+@receiver(post_save, sender=VideoTitle)
+def video_title_saved(sender, instance, created, raw=False, **kwargs):
+    """Egyenként mentett cím (admin, shell) a számlálókban; a nézetek bulk írásai maguk növelik őket"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_previous", None)
+    current = (instance.project_id, instance.raw_uploaded, instance.editing_done)
+    if previous == current:
+        return
+    if previous:
+        Project.objects.filter(pk=previous[0]).update(**_title_counters(previous[1], previous[2], -1))
+    Project.objects.filter(pk=instance.project_id).update(
+        **_title_counters(instance.raw_uploaded, instance.editing_done, 1)
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """A dolgozó keresőindex érvénytelenítése (a belépéskori last_login mentés kivételével)"""
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    employee_index.invalidate()
+
+
+@receiver(pre_save, sender=Log)
+def log_moving(sender, instance, raw=False, **kwargs):
+    # Módosított log korábbi projektje és órái: áthelyezéskor mindkét projekt számlálója és napló sorai változnak
+    if not raw and not instance._state.adding:
+        instance._previous = Log.objects.filter(pk=instance.pk).values_list("project_id", "hours").first()
+
+
+@receiver(post_save, sender=Log)
+def log_saved_counters(sender, instance, created, raw=False, **kwargs):
+    """A logolt órák hozzáadása a projekt számlálójához (módosításkor a régi órák levonása)"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_previous", None)
+    if previous == (instance.project_id, instance.hours):
+        return
+    if previous:
+        Project.objects.filter(pk=previous[0]).update(logged_hours=Greatest(F("logged_hours") - previous[1], Value(0)))
+    Project.objects.filter(pk=instance.project_id).update(logged_hours=F("logged_hours") + instance.hours)
+
+
+@receiver(post_save, sender=Log)
+def log_saved_ledger(sender, instance, created, raw=False, **kwargs):
+    """A bevételi napló követi a log felvételét és módosítását (nézet, admin, shell)"""
+    if raw:
+        return
+    if created:
+        ledger_add_log(instance)
+        return
+    # Óra, dátum vagy projekt módosulhatott: a régi napi értékek nem ismertek, a projekt újraszámolódik
+    previous = getattr(instance, "_previous", None)
+    project_ids = {instance.project_id, previous[0] if previous else None} - {None}
+    refresh_ledger(project_ids)
+
+
+@receiver(post_delete, sender=Log)
+def log_deleted_ledger(sender, instance, origin=None, **kwargs):
+    """Törölt log kivezetése a naplóból; projekt vagy dolgozó törlésekor a saját receiverük frissít egyszer"""
+    if _origin_model(origin) in (Project, CustomUser):
+        return
+    ledger_remove_log(instance)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def employee_deleting(sender, instance, **kwargs):
+    # A dolgozó logjai a törléssel eltűnnek, ezért az érintett projekteket és hónapokat előtte kell kigyűjteni
+    project_ids = list(instance.logs.values_list("project_id", flat=True).distinct())
+    instance._log_project_ids = project_ids
+    instance._finance_months = completed_project_months(project_ids) if project_ids else set()
+
+
+@receiver(post_delete, sender=CustomUser)
+def employee_deleted(sender, instance, **kwargs):
+    """A törölt dolgozó projektjeinek számlálói, napló sorai és hónapjai egyszerre frissülnek (nézetből és adminból is)"""
+    project_ids = getattr(instance, "_log_project_ids", None)
+    if project_ids:
+        Project.objects.filter(pk__in=project_ids).update(**Project.counter_expressions())
+        refresh_ledger(project_ids)
+        _invalidate_on_commit(getattr(instance, "_finance_months", None))
+
+
+@receiver(post_save, sender=Log)
+@receiver(post_delete, sender=Log)
+def log_changed_finance(sender, instance, origin=None, **kwargs):
+    """Lezárt projekt logja a projekt összes hónapjának bevétel arányát módosítja"""
+    if _origin_model(origin) in (Project, CustomUser):
+        return  # projekt, ill. dolgozó törlésekor a saját receiverük egyszer gyűjti ki a hónapokat
+    if Project.objects.filter(pk=instance.project_id, is_completed=True).exists():
+        day = instance.work_date
+        _invalidate_on_commit(project_months(instance.project_id) | {(day.year, day.month)})
+
+
+@receiver(post_save, sender=Project)
+def project_saved_ledger(sender, instance, created, raw=False, **kwargs):
+    """Bevétel módosítás, lezárás vagy újranyitás: csak lezárt projekt bevétele jelenik meg a naplóban"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_saved_ledger_state", None)
+    current = instance.ledger_state()
+    instance._saved_ledger_state = current
+    if created or (previous is not None and previous == current):
+        return
+    # Ismeretlen korábbi állapotnál (nem az adatbázisból töltött példány) is frissül
+    was_completed = previous[1] if previous else True
+    if instance.is_completed or was_completed:
+        refresh_ledger([instance.pk])
+        _invalidate_on_commit(project_months(instance.pk))
+
+
+@receiver(pre_delete, sender=Project)
+def project_deleted_finance(sender, instance, **kwargs):
+    # A napló sorai a projekttel együtt törlődnek, ezért a hónapokat előtte kell kigyűjteni
+    if instance.is_completed:
+        _invalidate_on_commit(project_months(instance.pk))
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def expense_changed(sender, instance, **kwargs):
+    if instance.date:
+        _invalidate_on_commit({(instance.date.year, instance.date.month)})
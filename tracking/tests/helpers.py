@@ -0,0 +1,69 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import CustomUser, Log, PhotoLogProgress, Project, ProjectMembership
+
+
+def make_project(title, **fields):
+    fields.setdefault("company", "Teszt Kft.")
+    fields.setdefault("revenue", Decimal(100000))
+    return Project.objects.create(title=title, **fields)
+
+
+def make_log(user, project, hours, moment=None, **progress):
+    """Log a megadott időponttal (a date mező auto_now_add, ezért mentés után állítjuk); fotós haladással"""
+    log = Log.objects.create(user=user, project=project, hours=hours)
+    if moment is not None:
+        log.date = moment
+        log.save()
+    if progress:
+        PhotoLogProgress.objects.create(log=log, **progress)
+    return log
+
+
+# A tesztek cache-e a teszt folyamatában él: a fejlesztői adatbázis fájl cache-ét nem olvassák és nem írják
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "finance": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "finance-tests"},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CacheIsolatedTestCase(TestCase):
+    """Tesztenként üres cache-ből induló TestCase"""
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+
+class VideoProjectTestCase(CacheIsolatedTestCase):
+    """Két videós projekt egy íróval és egy videóssal; logok a new_log_view-n keresztül"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.boss = CustomUser.objects.create(username="boss", is_boss=True)
+        cls.writer = CustomUser.objects.create(username="iro", job_role="iro")
+        cls.videographer = CustomUser.objects.create(username="videos", job_role="videos")
+        future = timezone.localdate() + timedelta(days=30)
+        cls.project = make_project("Videó", project_type="video", editor_deadline=future, required_video_count=3)
+        cls.other = make_project("Másik", project_type="video", editor_deadline=future, revenue=Decimal(50000))
+        for user in (cls.writer, cls.videographer):
+            for project in (cls.project, cls.other):
+                ProjectMembership.objects.create(user=user, project=project)
+
+    def post_log(self, user, project, hours, **extra):
+        self.client.force_login(user)
+        response = self.client.post(reverse("new_log", args=[project.pk]), {"hours": hours, "comment": "", **extra})
+        self.assertEqual(response.status_code, 302)
+        return Log.objects.filter(user=user, project=project).latest("pk")
+
+    def complete_project(self, project):
+        self.client.force_login(self.boss)
+        self.client.post(reverse("boss_project_view", args=[project.pk]), {"complete_project": "1"})
+        project.refresh_from_db()
@@ -0,0 +1,52 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import Log
+
+from .helpers import VideoProjectTestCase, make_log
+
+
+class ChartETagTests(VideoProjectTestCase):
+    """A diagramok ETag-je változatlan adatra 304-et, bármely nap változására új választ ad"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.boss)
+        self.params = {"year": 2024, "month": 3}
+        # Az 1–3. napra 1-1 óra egy lezárt projekten
+        for day in (1, 2, 3):
+            make_log(self.writer, self.project, 1, timezone.make_aware(datetime(2024, 3, day, 12)))
+        self.complete_project(self.project)
+        self.client.force_login(self.boss)
+
+    def get_chart(self, name, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(reverse(name), self.params, headers=headers)
+
+    def test_revenue_unchanged_returns_304(self):
+        response = self.get_chart("chart_revenue")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_chart("chart_revenue", response["ETag"]).status_code, 304)
+
+    def test_revenue_redistributed_between_days(self):
+        # A 2. nap 2 órára nő: az összeg és a napokkal súlyozott összeg nem változik, az adatsor igen
+        response = self.get_chart("chart_revenue")
+        log = Log.objects.get(work_date__day=2)
+        log.hours = Decimal(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            log.save()
+        changed = self.get_chart("chart_revenue", response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], response["ETag"])
+        self.assertEqual(changed.json()["values"][:3], [25000, 50000, 25000])
+
+    def test_hours_chart(self):
+        self.client.force_login(self.writer)
+        response = self.get_chart("chart_hours")
+        self.assertEqual(response.json()["values"][:3], [1.0, 1.0, 1.0])
+        self.assertEqual(self.get_chart("chart_hours", response["ETag"]).status_code, 304)
+        make_log(self.writer, self.other, 2, timezone.make_aware(datetime(2024, 3, 5, 12)))
+        self.assertEqual(self.get_chart("chart_hours", response["ETag"]).status_code, 200)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import Log, Project, VideoTitle
+
+from .helpers import VideoProjectTestCase, make_log
+
+
+class CounterTests(VideoProjectTestCase):
+    """A projekt számlálói minden módosítás után a counter_expressions() szerint nulláról számolttal egyeznek"""
+
+    def assertCountersConsistent(self):
+        expressions = Project.counter_expressions()
+        for project in Project.objects.annotate(**{f"expected_{name}": e for name, e in expressions.items()}):
+            for name in expressions:
+                self.assertEqual(getattr(project, name), getattr(project, f"expected_{name}"), f"{project.title}: {name}")
+
+    def pending_title_ids(self):
+        return [str(pk) for pk in VideoTitle.objects.filter(project=self.project).values_list("pk", flat=True)]
+
+    def test_new_logs(self):
+        self.post_log(self.writer, self.project, "2", **{"new_titles[]": ["Egy", "Kettő", "egy"]})
+        self.post_log(self.videographer, self.project, "3.5", **{"filmed_titles[]": self.pending_title_ids()[:1]})
+        self.post_log(self.videographer, self.other, "1")
+        self.project.refresh_from_db()
+        self.assertEqual(
+            (self.project.video_title_count, self.project.raw_uploaded_count, self.project.logged_hours),
+            (2, 1, Decimal("5.5")),
+        )
+        self.assertCountersConsistent()
+
+    def test_log_create_edit_move_and_delete(self):
+        # Adminból / shellből felvett log: a logged_hours a signal receiverekből követi
+        log = make_log(self.writer, self.project, 4, timezone.now() - timedelta(days=2))
+        self.assertCountersConsistent()
+        log.hours = Decimal("1.5")
+        log.save()
+        self.assertCountersConsistent()
+        log.project = self.other
+        log.save()
+        self.assertCountersConsistent()
+        log.delete()
+        self.assertCountersConsistent()
+
+    def test_delete_employee(self):
+        self.post_log(self.writer, self.project, "2", **{"new_titles[]": ["Egy", "Kettő"]})
+        self.post_log(self.videographer, self.project, "3", **{"filmed_titles[]": self.pending_title_ids()})
+        self.post_log(self.videographer, self.other, "1")
+        self.client.force_login(self.boss)
+        response = self.client.post(reverse("delete_employee", args=[self.videographer.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.logged_hours, self.project.video_title_count), (Decimal(2), 2))
+        self.assertFalse(Log.objects.filter(user_id=self.videographer.pk).exists())
+        self.assertCountersConsistent()
+
+    def test_delete_video_title(self):
+        self.post_log(self.writer, self.project, "2", **{"new_titles[]": ["Egy", "Kettő"]})
+        titles = self.pending_title_ids()
+        self.post_log(self.videographer, self.project, "1", **{"filmed_titles[]": titles})
+        VideoTitle.objects.get(pk=titles[0]).delete()
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.video_title_count, self.project.raw_uploaded_count), (1, 1))
+        self.assertCountersConsistent()
+
+    def test_delete_project(self):
+        self.post_log(self.writer, self.project, "2", **{"new_titles[]": ["Egy"]})
+        self.post_log(self.writer, self.other, "1")
+        self.project.delete()
+        self.assertCountersConsistent()
+
+    def test_video_title_saved_one_by_one(self):
+        # Adminból felvett, pipált és másik projektre áthelyezett cím
+        title = VideoTitle.objects.create(project=self.project, title="Admin cím")
+        self.assertCountersConsistent()
+        title.raw_uploaded = True
+        title.save()
+        self.assertCountersConsistent()
+        title.editing_done = True
+        title.project = self.other
+        title.save()
+        self.assertCountersConsistent()
+        title.raw_uploaded = title.editing_done = False
+        title.save()
+        self.assertCountersConsistent()
+        VideoTitle.objects.create(project=self.project, title="Kész cím", raw_uploaded=True, editing_done=True)
+        self.assertCountersConsistent()
+
+    def test_project_views_do_not_write_counters(self):
+        # A nézetek a kérés elején töltik be a projektet; a mentés nem írhatja felül a közben növelt számlálókat
+        self.post_log(self.writer, self.project, "2", **{"new_titles[]": ["Egy"]})
+        self.client.force_login(self.boss)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse("edit_project", args=[self.project.pk]), {"revenue": "120000", "description": "új"})
+            self.complete_project(self.project)
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "tracking_project"')]
+        self.assertTrue(updates)
+        for sql in updates:
+            for name in Project.counter_expressions():
+                self.assertNotIn(f'"{name}"', sql)
+        self.assertEqual((self.project.logged_hours, self.project.video_title_count), (Decimal(2), 1))
+        self.assertEqual(self.project.revenue, 120000)
+        self.assertCountersConsistent()
@@ -0,0 +1,63 @@
+from datetime import datetime
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import Expense
+
+from .helpers import VideoProjectTestCase, make_log
+
+PERIOD = {"start": "2024-03-01", "end": "2024-03-31"}
+
+
+class ExportTests(VideoProjectTestCase):
+    """A log és kiadás exportok az időszak sorait streamelik, WSGI és ASGI alatt ugyanazzal a tartalommal"""
+
+    def setUp(self):
+        super().setUp()
+        self.writer.first_name, self.writer.last_name = "Írisz", "Kelemen"
+        self.writer.save()
+        make_log(self.writer, self.project, Decimal("1.5"), timezone.make_aware(datetime(2024, 3, 31, 23, 30)))
+        make_log(self.videographer, self.other, 2, timezone.make_aware(datetime(2024, 4, 1, 9)))
+        for day in (datetime(2024, 3, 2), datetime(2024, 4, 2)):
+            expense = Expense.objects.create(amount=Decimal(1200), description="Parkolás", created_by=self.boss)
+            Expense.objects.filter(pk=expense.pk).update(date=day.date())
+
+    def export(self, name, params=PERIOD):
+        self.client.force_login(self.boss)
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_logs(self):
+        content = self.export("export_logs")
+        self.assertTrue(content.startswith("\ufeffNap,Rögzítve,Dolgozó,"))
+        rows = content.splitlines()[1:]
+        # A napba a helyi idő szerint eső log igen, a következő napi nem
+        self.assertEqual(rows, ["2024-03-31,2024-03-31 23:30,Írisz Kelemen,iro,Forgatókönyv Író,Videó,Teszt Kft.,1.5,"])
+
+    def test_expenses(self):
+        rows = self.export("export_expenses").splitlines()[1:]
+        self.assertEqual(rows, ["2024-03-02,Parkolás,1200,boss"])
+
+    def test_asgi_matches_wsgi(self):
+        client = AsyncClient()
+        client.force_login(self.boss)
+        for name in ("export_logs", "export_expenses"):
+            expected = self.export(name)
+
+            async def fetch():
+                response = await client.get(reverse(name), PERIOD)
+                return b"".join([chunk async for chunk in response.streaming_content]).decode("utf-8")
+
+            self.assertEqual(async_to_sync(fetch)(), expected)
+
+    def test_boss_only_and_invalid_period(self):
+        self.client.force_login(self.writer)
+        self.assertNotEqual(self.client.get(reverse("export_logs")).status_code, 200)
+        self.client.force_login(self.boss)
+        response = self.client.get(reverse("export_logs"), {"start": "2024-13-01"})
+        self.assertRedirects(response, reverse("expenses"), fetch_redirect_response=False)
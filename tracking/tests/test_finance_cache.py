@@ -0,0 +1,44 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+
+from tracking.finance_cache import cached_month, invalidate_months, profit_series, revenue_series
+from tracking.models import Expense, Log
+
+from .helpers import VideoProjectTestCase, make_log
+
+
+class FinanceCacheTests(VideoProjectTestCase):
+    """A pénzügyi cache a commit utáni érvénytelenítés után a friss adatot adja"""
+
+    def setUp(self):
+        super().setUp()
+        for day in (1, 2):
+            make_log(self.writer, self.project, 1, timezone.make_aware(datetime(2024, 3, day, 12)))
+        self.complete_project(self.project)
+
+    def test_log_change_invalidates_revenue(self):
+        self.assertEqual(revenue_series(2024, 3)["values"][:2], [50000, 50000])
+        log = Log.objects.get(work_date__day=2)
+        log.hours = Decimal(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            log.save()
+        self.assertEqual(revenue_series(2024, 3)["values"][:2], [25000, 75000])
+
+    def test_expense_invalidates_profit(self):
+        today = timezone.localdate()
+        before = sum(profit_series(today.year, today.month)["values"])
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(amount=Decimal(3000), description="Bérleti díj")
+        self.assertEqual(sum(profit_series(today.year, today.month)["values"]), before - 3000)
+
+    def test_value_computed_before_invalidation_is_not_served(self):
+        # Egy olvasó a régi adatból számol, közben egy írás commitja érvényteleníti a hónapot
+        def stale(year, month):
+            invalidate_months({(year, month)})
+            return "régi"
+
+        self.assertEqual(cached_month("revenue_series", 2024, 3, stale), "régi")
+        self.assertEqual(cached_month("revenue_series", 2024, 3, lambda year, month: "friss"), "friss")
+        self.assertEqual(cached_month("revenue_series", 2024, 3, stale), "friss")
@@ -0,0 +1,89 @@
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import DailyRevenue, Expense, Log, VideoTitle
+
+from .helpers import VideoProjectTestCase, make_log
+
+
+class ImportCsvTests(VideoProjectTestCase):
+    """Az export → import_csv kör ugyanazokat a sorokat adja vissza; a címek projektenként egyediek"""
+
+    def write_csv(self, content):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def export(self, name):
+        self.client.force_login(self.boss)
+        response = self.client.get(reverse(f"export_{name}"), {"start": "2024-01-01", "end": "2024-12-31"})
+        self.assertEqual(response.status_code, 200)
+        return self.write_csv(b"".join(response.streaming_content).decode("utf-8-sig"))
+
+    def import_csv(self, *args):
+        out = StringIO()
+        call_command("import_csv", *args, stdout=out)
+        return out.getvalue()
+
+    def test_logs_round_trip(self):
+        make_log(self.writer, self.project, Decimal("1.5"), timezone.make_aware(datetime(2024, 3, 1, 9, 30)))
+        log = make_log(self.videographer, self.other, 4, timezone.make_aware(datetime(2024, 3, 2, 18, 5)))
+        log.comment = 'Vágás; "B" kamera'
+        log.save()
+        fields = ("user_id", "project_id", "date", "work_date", "hours", "comment")
+        before = list(Log.objects.order_by("date").values_list(*fields))
+        ledger = list(DailyRevenue.objects.order_by("project_id", "day").values_list("project_id", "day", "hours"))
+        path = self.export("logs")
+        Log.objects.all().delete()
+
+        self.assertIn("Importálva: 2 sor, elutasítva: 0", self.import_csv("logs", path))
+        self.assertEqual(list(Log.objects.order_by("date").values_list(*fields)), before)
+        self.assertEqual(list(DailyRevenue.objects.order_by("project_id", "day").values_list("project_id", "day", "hours")), ledger)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.logged_hours, Decimal("1.5"))
+
+    def test_expenses_round_trip(self):
+        for day, amount in ((5, 12000), (20, 800)):
+            expense = Expense.objects.create(amount=Decimal(amount), description=f"Bérlés {day}.", created_by=self.boss)
+            Expense.objects.filter(pk=expense.pk).update(date=datetime(2024, 4, day).date())
+        fields = ("date", "description", "amount", "created_by_id")
+        before = list(Expense.objects.order_by("date").values_list(*fields))
+        path = self.export("expenses")
+        Expense.objects.all().delete()
+
+        self.assertIn("Importálva: 2 sor, elutasítva: 0", self.import_csv("expenses", path))
+        self.assertEqual(list(Expense.objects.order_by("date").values_list(*fields)), before)
+
+    def test_titles_deduplicated_per_project(self):
+        VideoTitle.objects.create(project=self.project, title="Bemutató")
+        path = self.write_csv(
+            "Projekt;Cég;Cím;Nyersanyag feltöltve;Vágás kész\n"
+            "Videó;Teszt Kft.;bemutató;;\n"           # már van a projektben
+            "Videó;Teszt Kft.;Interjú;igen;nem\n"
+            "Videó;Teszt Kft.;INTERJÚ;;\n"            # a fájlban már szerepelt
+            "Másik;Teszt Kft.;Interjú;igen;igen\n"     # másik projektben megengedett
+            "Videó;Teszt Kft.;Drón;nem;igen\n"         # vágás nyersanyag nélkül
+            "Videó;Teszt Kft.;Utómunka;talán;\n"
+        )
+        rejects = path + ".rejects"
+        self.addCleanup(os.remove, rejects)
+        self.assertIn("Importálva: 2 sor, elutasítva: 4", self.import_csv("titles", path, "--rejects", rejects))
+        titles = VideoTitle.objects.order_by("project_id", "title").values_list("project__title", "title", "raw_uploaded", "editing_done")
+        self.assertEqual(list(titles), [
+            ("Videó", "Bemutató", False, False), ("Videó", "Interjú", True, False), ("Másik", "Interjú", True, True),
+        ])
+        self.project.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.project.video_title_count, self.project.raw_uploaded_count), (2, 1))
+        self.assertEqual((self.other.raw_uploaded_count, self.other.editing_done_count), (1, 1))
+        with open(rejects, encoding="utf-8-sig") as f:
+            self.assertEqual(len(f.readlines()), 5)
@@ -0,0 +1,53 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import CustomUser
+from tracking.revenue import employee_revenue
+
+from .helpers import VideoProjectTestCase, make_log
+
+
+def moment(month, day):
+    return timezone.make_aware(datetime(2024, month, day, 12))
+
+
+class LeaderboardTests(VideoProjectTestCase):
+    """Ranglista: a projekt bevétele a dolgozók összes órához mért arányában, holtversenyben azonos helyezés"""
+
+    def setUp(self):
+        super().setUp()
+        self.photographer = CustomUser.objects.create(username="fotos", job_role="fotos")
+        # A Videó projekt 5 órájából 1 az íróé és 3 a videósé márciusban, 1 a videósé februárban
+        make_log(self.writer, self.project, 1, moment(3, 4))
+        make_log(self.videographer, self.project, 3, moment(3, 5))
+        make_log(self.videographer, self.project, 1, moment(2, 20))
+        make_log(self.writer, self.other, 2, moment(3, 6))
+
+    def leaderboard(self, **params):
+        self.client.force_login(self.boss)
+        response = self.client.get(reverse("leaderboard"), {"year": 2024, "month": 3, **params})
+        return [(row["employee"], row["rank"], row["revenue"], row["hours"], row["share"]) for row in response.context["rows"]]
+
+    def test_revenue_split(self):
+        self.assertEqual(employee_revenue(2024, 3), {
+            self.writer.pk: {"hours": Decimal(3), "revenue": 70000, "projects": 2},
+            self.videographer.pk: {"hours": Decimal(3), "revenue": 60000, "projects": 1},
+        })
+
+    def test_ranked_by_revenue(self):
+        # Log nélküli aktív dolgozó nullával szerepel, a boss nem
+        self.assertEqual(self.leaderboard(), [
+            (self.writer, 1, 70000, Decimal(3), 100),
+            (self.videographer, 2, 60000, Decimal(3), 86),
+            (self.photographer, 3, 0, 0, 0),
+        ])
+
+    def test_ranked_by_hours_with_tie(self):
+        self.assertEqual(self.leaderboard(sort="hours"), [
+            (self.writer, 1, 70000, Decimal(3), 100),
+            (self.videographer, 1, 60000, Decimal(3), 100),
+            (self.photographer, 3, 0, 0, 0),
+        ])
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import DailyRevenue, Log
+from tracking.revenue import rebuild_ledger
+
+from .helpers import VideoProjectTestCase, make_log
+
+
+class LedgerTests(VideoProjectTestCase):
+    """A bevételi napló minden módosítás után a logokból nulláról újraépítettel egyezik"""
+
+    def assertLedgerConsistent(self):
+        rows = DailyRevenue.objects.order_by("project_id", "day").values_list("project_id", "day", "hours", "revenue")
+        ledger = list(rows)
+        rebuild_ledger()
+        self.assertEqual(ledger, list(rows))
+
+    def test_new_logs(self):
+        self.post_log(self.writer, self.project, "2")
+        self.post_log(self.videographer, self.project, "3.5")
+        self.post_log(self.videographer, self.other, "1")
+        self.assertEqual(DailyRevenue.objects.get(project=self.project).hours, Decimal("5.5"))
+        self.assertLedgerConsistent()
+
+    def test_log_edit_move_and_delete(self):
+        make_log(self.writer, self.project, 4, timezone.now() - timedelta(days=2))
+        log = self.post_log(self.videographer, self.project, "2")
+        log.hours = Decimal(3)
+        log.save()
+        self.assertLedgerConsistent()
+        # Másik projektre áthelyezett log: mindkét projekt napló sorai változnak
+        log.project = self.other
+        log.save()
+        self.assertLedgerConsistent()
+        log.delete()
+        self.assertLedgerConsistent()
+        # Az utolsó log törlésével a nap sora is eltűnik
+        Log.objects.get(project=self.project).delete()
+        self.assertFalse(DailyRevenue.objects.filter(project=self.project).exists())
+        self.assertLedgerConsistent()
+
+    def test_completed_project(self):
+        make_log(self.writer, self.project, 4, timezone.now() - timedelta(days=2))
+        self.post_log(self.videographer, self.project, "2")
+        self.complete_project(self.project)
+        revenue = DailyRevenue.objects.filter(project=self.project).values_list("revenue", flat=True)
+        self.assertEqual(sum(revenue), self.project.revenue)
+        self.assertLedgerConsistent()
+
+        log = Log.objects.filter(project=self.project).latest("pk")
+        log.hours = Decimal(6)
+        log.save()
+        self.assertLedgerConsistent()
+        log.delete()
+        self.assertLedgerConsistent()
+
+        self.project.revenue = F("revenue") + 1000
+        self.project.save()
+        self.project.refresh_from_db()
+        self.assertLedgerConsistent()
+        # Újranyitáskor a bevétel kikerül a naplóból
+        self.project.is_completed = False
+        self.project.save()
+        self.assertFalse(DailyRevenue.objects.filter(project=self.project, revenue__gt=0).exists())
+        self.assertLedgerConsistent()
+
+    def test_revenue_change_after_refresh(self):
+        self.post_log(self.writer, self.project, "2")
+        self.complete_project(self.project)
+        old_revenue = self.project.revenue
+        # Közben egy másik kérés módosítja a bevételt; a frissített példány visszaállítása is frissít
+        concurrent = type(self.project).objects.get(pk=self.project.pk)
+        concurrent.revenue = old_revenue + 5000
+        concurrent.save()
+        self.project.refresh_from_db()
+        self.project.revenue = old_revenue
+        self.project.save()
+        self.assertLedgerConsistent()
+
+    def test_delete_employee(self):
+        self.post_log(self.writer, self.project, "2")
+        self.post_log(self.videographer, self.project, "3")
+        self.post_log(self.videographer, self.other, "1")
+        self.client.force_login(self.boss)
+        response = self.client.post(reverse("delete_employee", args=[self.videographer.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(DailyRevenue.objects.get(project=self.project).hours, Decimal(2))
+        self.assertFalse(DailyRevenue.objects.filter(project=self.other).exists())
+        self.assertLedgerConsistent()
+
+    def test_delete_project(self):
+        self.post_log(self.writer, self.project, "2")
+        self.post_log(self.writer, self.other, "1")
+        project_id = self.project.pk
+        self.project.delete()
+        self.assertFalse(DailyRevenue.objects.filter(project_id=project_id).exists())
+        self.assertLedgerConsistent()
@@ -0,0 +1,30 @@
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import CustomUser
+
+from .helpers import CacheIsolatedTestCase
+
+
+class MonthParamsTests(CacheIsolatedTestCase):
+    """Hibás ?year= / ?month= paraméterre a havi nézetek az aktuális hónapot mutatják 500 helyett"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.boss = CustomUser.objects.create(username="boss", is_boss=True)
+
+    def setUp(self):
+        self.client.force_login(self.boss)
+
+    def test_invalid_values_fall_back_to_today(self):
+        today = timezone.now().date()
+        views = ("leaderboard", "payroll", "export_payroll", "chart_revenue", "employees_list", "expenses", "boss_dashboard")
+        for name in views:
+            for query in ("?month=13", "?month=0", "?month=abc", "?year=abc", "?year=0&month=2"):
+                with self.subTest(view=name, query=query):
+                    response = self.client.get(reverse(name) + query)
+                    self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse("leaderboard") + "?month=13&year=abc")
+        self.assertEqual((response.context["year"], response.context["month"]), (today.year, today.month))
+        data = self.client.get(reverse("chart_revenue") + "?month=abc&year=2024").json()
+        self.assertEqual((data["year"], data["month"]), (2024, today.month))
@@ -0,0 +1,65 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+
+from tracking.models import Project
+from tracking.payroll import monthly_payroll, payroll_lines
+
+from .helpers import VideoProjectTestCase, make_log
+
+
+def moment(month, day):
+    return timezone.make_aware(datetime(2024, month, day, 12))
+
+
+class PayrollTests(VideoProjectTestCase):
+    """Bérjegyzék: lezárási hónapban a teljes szerepkör díj, órák szerinti módban a havi órák aránya"""
+
+    def setUp(self):
+        super().setUp()
+        Project.objects.filter(pk=self.project.pk).update(pay_writer=20000, pay_videographer=30000)
+        Project.objects.filter(pk=self.other.pk).update(pay_writer=5000)
+        make_log(self.writer, self.project, 2, moment(3, 10))
+        make_log(self.writer, self.project, 2, moment(4, 5))
+        make_log(self.videographer, self.project, 4, moment(4, 6))
+        make_log(self.writer, self.other, 1, moment(4, 7))
+        # Áprilisban lezárt projekt; a másik folyamatban van
+        Project.objects.filter(pk=self.project.pk).update(is_completed=True, completed_at=moment(4, 15))
+
+    def amounts(self, month, prorate):
+        return {(line["user_id"], line["project_id"]): line["amount"] for line in payroll_lines(2024, month, prorate)}
+
+    def test_completed_mode(self):
+        self.assertEqual(self.amounts(3, False), {})
+        self.assertEqual(self.amounts(4, False), {
+            (self.writer.pk, self.project.pk): Decimal(20000), (self.videographer.pk, self.project.pk): Decimal(30000),
+        })
+
+    def test_hours_mode(self):
+        self.assertEqual(self.amounts(3, True), {(self.writer.pk, self.project.pk): Decimal(10000)})
+        self.assertEqual(self.amounts(4, True), {
+            (self.writer.pk, self.project.pk): Decimal(10000), (self.videographer.pk, self.project.pk): Decimal(30000),
+            (self.writer.pk, self.other.pk): Decimal(5000),
+        })
+        writer = next(e for e in monthly_payroll(2024, 4, prorate=True) if e["user_id"] == self.writer.pk)
+        self.assertEqual((writer["total"], writer["month_hours"], len(writer["lines"])), (Decimal(15000), Decimal(3), 2))
+
+    def test_views(self):
+        self.client.force_login(self.boss)
+        response = self.client.get(reverse("payroll"), {"year": 2024, "month": 4, "mode": "hours"})
+        self.assertEqual((response.context["total"], response.context["line_count"]), (Decimal(45000), 3))
+        response = self.client.get(reverse("export_payroll"), {"year": 2024, "month": 4})
+        rows = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(rows[0].startswith("Dolgozó,"))
+
+    def test_completed_at_follows_completion(self):
+        self.complete_project(self.other)
+        self.assertIsNotNone(self.other.completed_at)
+        self.assertEqual(self.other.completed_at.date(), timezone.now().date())
+        self.other.is_completed = False
+        self.other.save(update_fields=["is_completed"])
+        self.other.refresh_from_db()
+        self.assertIsNone(self.other.completed_at)
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from tracking.models import CustomUser, Log, PhotoLogProgress
+
+from .helpers import CacheIsolatedTestCase, make_log, make_project
+
+
+class LatestByMemberTests(CacheIsolatedTestCase):
+    """latest_by_member(): projekt-dolgozó páronként a legutolsó log (dátum, majd pk szerint) haladása"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.photographer = CustomUser.objects.create(username="fotos", job_role="fotos")
+        cls.other_photographer = CustomUser.objects.create(username="fotos2", job_role="fotos")
+        cls.projects = [make_project(f"Fotó {i}", project_type="photo") for i in range(2)]
+        moment = timezone.now() - timedelta(days=3)
+        for offset, user, project, progress in (
+            (0, cls.photographer, cls.projects[0], {"fieldwork_done": True}),
+            (2, cls.photographer, cls.projects[0], {"fieldwork_done": True, "editing_done": True}),
+            (1, cls.photographer, cls.projects[0], {}),
+            (1, cls.other_photographer, cls.projects[0], {"editing_done": True}),
+            # Azonos időpontnál a későbbi log (nagyobb pk) a legutolsó
+            (1, cls.other_photographer, cls.projects[0], {}),
+            (0, cls.photographer, cls.projects[1], {"fieldwork_done": True}),
+        ):
+            make_log(user, project, 1, moment + timedelta(days=offset), **progress)
+
+    def python_latest(self, project_ids, user_ids=None):
+        latest = {}
+        for log in Log.objects.filter(project_id__in=project_ids):
+            if user_ids is not None and log.user_id not in user_ids:
+                continue
+            key = (log.project_id, log.user_id)
+            if key not in latest or (log.date, log.pk) > (latest[key].date, latest[key].pk):
+                latest[key] = log
+        return {key: getattr(log, "photo_progress", None) for key, log in latest.items()}
+
+    def test_matches_python(self):
+        project_ids = [p.pk for p in self.projects]
+        for user_ids in (None, [self.photographer.pk], [self.other_photographer.pk]):
+            with self.subTest(user_ids=user_ids):
+                self.assertEqual(
+                    PhotoLogProgress.latest_by_member(project_ids, user_ids), self.python_latest(project_ids, user_ids)
+                )
+
+    def test_latest_log_without_progress(self):
+        latest = PhotoLogProgress.latest_by_member([self.projects[0].pk])
+        self.assertTrue(latest[(self.projects[0].pk, self.photographer.pk)].is_done)
+        self.assertIsNone(latest[(self.projects[0].pk, self.other_photographer.pk)])
+        self.assertNotIn((self.projects[1].pk, self.other_photographer.pk), latest)
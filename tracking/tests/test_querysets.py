@@ -0,0 +1,163 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from tracking.models import CustomUser, Project, ProjectMembership, VideoTitle
+
+from .helpers import CacheIsolatedTestCase, make_log, make_project
+
+
+def python_available(user):
+    """Az available_for() Python megfelelője (a korábbi new_project_signup_view szűrése)"""
+    occupied = set()
+    for membership in ProjectMembership.objects.filter(user=user).select_related("project"):
+        occupied.update(d for d in (membership.project.videographer_date, membership.project.photo_onsite_date) if d)
+    if user.job_role in ("videos", "iro", "vago"):
+        types, date_field = ("video", "both"), "videographer_date"
+    elif user.job_role == "fotos":
+        types, date_field = ("photo", "both"), "photo_onsite_date"
+    else:
+        return set()
+    return {
+        p.pk for p in Project.objects.filter(project_type__in=types).exclude(memberships__user=user)
+        if not p.is_expired and not p.is_completed
+        and (not getattr(p, date_field) or getattr(p, date_field) not in occupied)
+        and p.role_has_capacity(user.job_role)
+    }
+
+
+class ProjectQuerySetTests(CacheIsolatedTestCase):
+    """A ProjectQuerySet SQL kifejezései a modell Python logikájával egyeznek"""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        future, past = today + timedelta(days=30), today - timedelta(days=30)
+        cls.shoot_day = today + timedelta(days=10)
+        slots = {"max_writer_count": 2, "max_photographer_count": 2, "max_videographer_count": 2, "max_editor_count": 2}
+
+        cls.videographer = CustomUser.objects.create(username="videos", job_role="videos")
+        cls.other_videographer = CustomUser.objects.create(username="videos2", job_role="videos")
+        cls.writer = CustomUser.objects.create(username="iro", job_role="iro")
+        cls.editor = CustomUser.objects.create(username="vago", job_role="vago")
+        cls.photographer = CustomUser.objects.create(username="fotos", job_role="fotos")
+        cls.other_photographer = CustomUser.objects.create(username="fotos2", job_role="fotos")
+        cls.no_role = CustomUser.objects.create(username="nincs")
+
+        cls.video_open = make_project("Videó", project_type="video", editor_deadline=future, **slots)
+        # Videó projektnél a fotós határidő nem számít: a lejárt szerkesztési határidő dönt
+        cls.video_expired = make_project(
+            "Lejárt videó", project_type="video", editor_deadline=past, photo_editing_deadline=future, **slots
+        )
+        # Fotó projektnél csak a fotó szerkesztési határidő számít
+        cls.photo_open = make_project(
+            "Fotó", project_type="photo", writer_deadline=past, photo_editing_deadline=future, **slots
+        )
+        cls.photo_expired = make_project("Lejárt fotó", project_type="photo", photo_editing_deadline=past, **slots)
+        cls.photo_no_dates = make_project("Fotó dátum nélkül", project_type="photo", **slots)
+        cls.both_mixed = make_project(
+            "Vegyes", project_type="both", editor_deadline=future, photo_editing_deadline=past, **slots
+        )
+        cls.both_expired = make_project(
+            "Lejárt vegyes", project_type="both", writer_deadline=past, editor_deadline=past, **slots
+        )
+        cls.video_no_dates = make_project("Videó dátum nélkül", project_type="video", **slots)
+        cls.completed = make_project("Lezárt", project_type="video", editor_deadline=future, is_completed=True, **slots)
+        cls.full = make_project(
+            "Betelt", project_type="both", editor_deadline=future, **{**slots, "max_videographer_count": 1}
+        )
+        ProjectMembership.objects.create(user=cls.other_videographer, project=cls.full)
+
+        # A videós forgatási napja foglalt: az ugyanarra a napra eső projekt nem ajánlható neki
+        cls.booked = make_project(
+            "Foglalt", project_type="video", editor_deadline=future, videographer_date=cls.shoot_day, **slots
+        )
+        ProjectMembership.objects.create(user=cls.videographer, project=cls.booked)
+        cls.clash = make_project(
+            "Ütköző", project_type="video", editor_deadline=future, videographer_date=cls.shoot_day, **slots
+        )
+        # A fotósnál a saját projektje forgatási napja is foglalt
+        ProjectMembership.objects.create(user=cls.photographer, project=cls.booked)
+        cls.photo_clash = make_project(
+            "Fotó ütköző", project_type="photo", photo_editing_deadline=future, photo_onsite_date=cls.shoot_day, **slots
+        )
+
+    def test_available_for_matches_python(self):
+        for user in (self.videographer, self.other_videographer, self.writer, self.editor, self.photographer, self.no_role):
+            with self.subTest(user=user.username):
+                available = set(Project.objects.available_for(user).values_list("pk", flat=True))
+                self.assertEqual(available, python_available(user))
+
+    def test_available_for_rules(self):
+        videographer = set(Project.objects.available_for(self.videographer))
+        self.assertIn(self.video_open, videographer)
+        self.assertIn(self.video_no_dates, videographer)
+        self.assertIn(self.both_mixed, videographer)
+        unavailable = (self.video_expired, self.both_expired, self.completed, self.full, self.booked, self.clash, self.photo_open)
+        for project in unavailable:
+            self.assertNotIn(project, videographer)
+        self.assertIn(self.full, set(Project.objects.available_for(self.writer)))
+
+        photographer = set(Project.objects.available_for(self.photographer))
+        self.assertEqual(photographer, {self.photo_open, self.photo_no_dates, self.both_mixed, self.full})
+        self.assertIn(self.photo_clash, set(Project.objects.available_for(self.other_photographer)))
+        self.assertFalse(Project.objects.available_for(self.no_role).exists())
+
+    def test_with_stats_matches_properties(self):
+        make_log(self.videographer, self.booked, Decimal("2.5"))
+        Project.objects.update(**Project.counter_expressions())
+        for project in Project.objects.with_stats():
+            with self.subTest(project=project.title):
+                self.assertEqual(project.expired, project.is_expired)
+                self.assertEqual(project.deadline, project.main_deadline)
+                self.assertEqual(project.total_hours, project.total_logged_hours())
+                self.assertEqual(project.boss_done, project.is_boss_done())
+
+    def test_active_matches_is_active(self):
+        active = set(Project.objects.active())
+        self.assertEqual(active, {p for p in Project.objects.all() if p.is_active})
+
+
+class BossDoneTests(CacheIsolatedTestCase):
+    """boss_done (with_stats) és is_boss_done() fotós és videós feltételei"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.photographer = CustomUser.objects.create(username="fotos", job_role="fotos")
+        cls.other_photographer = CustomUser.objects.create(username="fotos2", job_role="fotos")
+        cls.photo = make_project("Fotó", project_type="photo")
+        for user in (cls.photographer, cls.other_photographer):
+            ProjectMembership.objects.create(user=user, project=cls.photo)
+        cls.start = timezone.now() - timedelta(days=5)
+
+    def assertBossDone(self, project, expected):
+        self.assertEqual(project.is_boss_done(), expected)
+        self.assertEqual(Project.objects.with_stats().get(pk=project.pk).boss_done, expected)
+
+    def test_photo_project_without_photographers_is_not_done(self):
+        self.assertBossDone(make_project("Üres fotó", project_type="photo"), False)
+
+    def test_latest_photo_log_decides(self):
+        make_log(self.photographer, self.photo, 3, self.start, fieldwork_done=True, editing_done=True)
+        # A másik fotós korábban kész volt, de a legutolsó logja szerint a szerkesztés még hátravan
+        make_log(self.other_photographer, self.photo, 3, self.start, fieldwork_done=True, editing_done=True)
+        make_log(self.other_photographer, self.photo, 1, self.start + timedelta(days=1), fieldwork_done=True)
+        self.assertBossDone(self.photo, False)
+        make_log(
+            self.other_photographer, self.photo, 1, self.start + timedelta(days=2), fieldwork_done=True, editing_done=True
+        )
+        self.assertBossDone(self.photo, True)
+
+    def test_photographer_without_logs_is_pending(self):
+        make_log(self.photographer, self.photo, 3, self.start, fieldwork_done=True, editing_done=True)
+        self.assertBossDone(self.photo, False)
+
+    def test_video_counters(self):
+        video = make_project("Videó", project_type="video", required_video_count=2)
+        self.assertBossDone(video, False)
+        for i in range(2):
+            VideoTitle.objects.create(project=video, title=f"Cím {i}", raw_uploaded=True, editing_done=True)
+        Project.objects.filter(pk=video.pk).update(**Project.counter_expressions())
+        video.refresh_from_db()
+        self.assertBossDone(video, True)
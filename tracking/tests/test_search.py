@@ -0,0 +1,49 @@
+from django.urls import reverse
+
+from tracking.models import CustomUser
+from tracking.search import employee_index, fold
+
+from .helpers import CacheIsolatedTestCase
+
+
+class EmployeeSearchTests(CacheIsolatedTestCase):
+    """employee_autocomplete: ékezet független, rangsorolt keresés az aktív dolgozók között"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.boss = CustomUser.objects.create(username="boss", is_boss=True)
+        cls.aron = CustomUser.objects.create(username="akovacs", first_name="Áron", last_name="Kovács", job_role="videos")
+        cls.akos = CustomUser.objects.create(username="aszabo", first_name="Ákos", last_name="Szabó", job_role="iro")
+        cls.peter = CustomUser.objects.create(username="paronfi", first_name="Péter", last_name="Áronfi", job_role="fotos")
+        CustomUser.objects.create(username="anagy", first_name="Áron", last_name="Nagy", is_active=False)
+
+    def setUp(self):
+        super().setUp()
+        # Az index folyamat szintű; az előző tesztek visszagörgetett felhasználói ne maradjanak benne
+        employee_index.invalidate()
+
+    def search(self, query):
+        self.client.force_login(self.boss)
+        response = self.client.get(reverse("employee_autocomplete"), {"q": query})
+        return [r["id"] for r in response.json()["results"]]
+
+    def test_fold(self):
+        self.assertEqual(fold("Árvíztűrő Tükörfúrógép"), "arvizturo tukorfurogep")
+
+    def test_accent_folded_and_ranked(self):
+        # Pontos egyezés a szó eleji előtt; inaktív dolgozó nincs a találatok között
+        self.assertEqual(self.search("aron"), [self.aron.pk, self.peter.pk])
+        self.assertEqual(self.search("ÁRON kovacs"), [self.aron.pk])
+        self.assertEqual(self.search("kov"), [self.aron.pk])
+        self.assertEqual(self.search("szbo"), [self.akos.pk])
+        self.assertEqual(self.search("zsofi"), [])
+
+    def test_user_changes_invalidate_index(self):
+        self.assertEqual(self.search("Zsófi"), [])
+        zsofi = CustomUser.objects.create(username="zsofi", first_name="Zsófia", last_name="Tóth")
+        self.assertEqual(self.search("zsof"), [zsofi.pk])
+        self.aron.last_name = "Tóth"
+        self.aron.save()
+        self.assertEqual(self.search("toth aron"), [self.aron.pk])
+        zsofi.delete()
+        self.assertEqual(self.search("zsof"), [])
@@ -20,6 +20,11 @@ urlpatterns = [
     path('boss/projects/<int:project_id>/delete/', views.delete_project_view, name='delete_project'),
     path('boss/expenses/', views.expenses_view, name='expenses'),
     path('boss/expenses/<int:expense_id>/delete/', views.delete_expense_view, name='delete_expense'),
+    path('boss/export/logs.csv', views.export_logs_view, name='export_logs'),
+    path('boss/export/expenses.csv', views.export_expenses_view, name='export_expenses'),
+    path('boss/payroll/', views.payroll_view, name='payroll'),
+    path('boss/leaderboard/', views.leaderboard_view, name='leaderboard'),
+    path('boss/export/payroll.csv', views.export_payroll_view, name='export_payroll'),
     path('boss/create-project/', views.create_project_view, name='create_project'),
     path('boss/new-employee/', views.new_employee_view, name='new_employee'),
 
@@ -30,4 +35,6 @@ urlpatterns = [
     path('my-projects/<int:project_id>/logs/<int:log_id>/', views.log_detail_view, name='log_detail'),
 
     path('ajax/employees/', views.employee_autocomplete, name='employee_autocomplete'),
+    path('ajax/chart/revenue/', views.chart_revenue_view, name='chart_revenue'),
+    path('ajax/chart/hours/', views.chart_hours_view, name='chart_hours'),
 ]
@@ -1,13 +1,22 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, transaction
 from django.utils import timezone
-from django.db.models import Sum, Q
-from django.http import JsonResponse
-from datetime import date
+from django.db.models import Sum, Count, Max, Q, F, OuterRef, Subquery, Value, DecimalField, Prefetch
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from datetime import MAXYEAR, MINYEAR, date
 from calendar import monthrange
-import json
+from itertools import islice
+import asyncio
+import csv
+import hashlib
 
 from .models import (
     CustomUser, Project, ProjectMembership, VideoTitle,
@@ -17,17 +26,39 @@ from .forms import (
     LoginForm, CustomPasswordChangeForm, NewEmployeeForm,
     CreateProjectForm, NewLogForm, ExpenseForm, EditProjectForm
 )
+from .revenue import month_bounds, employee_revenue
+from .finance_cache import revenue_series, profit_series, cached_monthly_totals
+from .payroll import monthly_payroll, payroll_lines
+from .search import employee_index
+
+# boss_project_view tagonként ennyi legutóbbi logot mutat alapból
+RECENT_LOGS_PER_MEMBER = 10
+# A CSV exportok ennyi soronként olvasnak az adatbázisból
+EXPORT_CHUNK_SIZE = 2000
 
 
 def boss_required(view_func):
-    @login_required
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_boss:
-            messages.error(request, "Ehhez boss jogosultság szükséges.")
-            return redirect("home")
-        return view_func(request, *args, **kwargs)
+    if iscoroutinefunction(view_func):
+        async def wrapper(request, *args, **kwargs):
+            if not (await _auser(request)).is_boss:
+                messages.error(request, "Ehhez boss jogosultság szükséges.")
+                return redirect("home")
+            return await view_func(request, *args, **kwargs)
+    else:
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_boss:
+                messages.error(request, "Ehhez boss jogosultság szükséges.")
+                return redirect("home")
+            return view_func(request, *args, **kwargs)
     wrapper.__name__ = view_func.__name__
-    return wrapper
+    return login_required(wrapper)
+
+
+async def _auser(request):
+    """Async nézetben a felhasználó betöltése; a sablon (auth context processor) a request.user-t olvassa,
+    aminek lusta betöltése az eseményciklusban tiltott szinkron DB hívás lenne"""
+    request.user = await request.auser()
+    return request.user
 
 
 def login_view(request):
@@ -47,21 +78,13 @@ def logout_view(request):
 
 
 @login_required
-def home_view(request):
-    user = request.user
-    today = timezone.now().date()
-    month = int(request.GET.get("month", today.month))
-    year = int(request.GET.get("year", today.year))
-    prev_month = month - 1 if month > 1 else 12
-    prev_year = year if month > 1 else year - 1
-    next_month = month + 1 if month < 12 else 1
-    next_year = year if month < 12 else year + 1
-    chart_data = _monthly_revenue(year, month) if user.is_boss else _user_daily_hours(user, year, month)
+async def home_view(request):
+    user = await _auser(request)
+    year, month = _chart_params(request)
+    # A diagram adatait a chart_revenue / chart_hours végpontból tölti le a böngésző
     return render(request, "tracking/home.html", {
-        "chart_data": json.dumps(chart_data),
-        "month": month, "year": year, "month_name": _month_name(month),
-        "prev_month": prev_month, "prev_year": prev_year,
-        "next_month": next_month, "next_year": next_year,
+        "chart_url": "chart_revenue" if user.is_boss else "chart_hours",
+        **_month_nav(year, month),
     })
 
 
@@ -76,34 +99,114 @@ def password_change_view(request):
 
 
 @boss_required
-def boss_dashboard_view(request):
+async def boss_dashboard_view(request):
+    year, month = _chart_params(request)
+    return render(request, "tracking/boss_dashboard.html", _month_nav(year, month))
+
+
+def _chart_params(request):
+    """A ?year= és ?month= paraméter; nem szám vagy tartományon kívüli érték esetén az aktuális év / hónap"""
     today = timezone.now().date()
-    month = int(request.GET.get("month", today.month))
-    year = int(request.GET.get("year", today.year))
-    prev_month = month - 1 if month > 1 else 12
-    prev_year = year if month > 1 else year - 1
-    next_month = month + 1 if month < 12 else 1
-    next_year = year if month < 12 else year + 1
-    return render(request, "tracking/boss_dashboard.html", {
-        "chart_data": json.dumps(_monthly_revenue(year, month)),
+    try:
+        year = int(request.GET.get("year", today.year))
+    except ValueError:
+        year = today.year
+    try:
+        month = int(request.GET.get("month", today.month))
+    except ValueError:
+        month = today.month
+    if not MINYEAR <= year <= MAXYEAR:
+        year = today.year
+    if not 1 <= month <= 12:
+        month = today.month
+    return year, month
+
+
+def _month_nav(year, month):
+    """A havi diagram fejlécének adatai (aktuális, előző és következő hónap)"""
+    return {
         "month": month, "year": year, "month_name": _month_name(month),
-        "prev_month": prev_month, "prev_year": prev_year,
-        "next_month": next_month, "next_year": next_year,
-    })
+        "prev_month": month - 1 if month > 1 else 12, "prev_year": year if month > 1 else year - 1,
+        "next_month": month + 1 if month < 12 else 1, "next_year": year if month < 12 else year + 1,
+    }
+
+
+def _revenue_chart_state(request, year, month):
+    """A bevétel diagram ETag-je a (cache-elt) havi adatsorból, így bármely nap változása új ETag-et ad
+
+    A napló sorai nem tárolnak időbélyeget, ezért Last-Modified nincs, csak ETag.
+    """
+    return revenue_series(year, month), None
+
+
+def _hours_chart_state(request, year, month):
+    logs = Log.objects.filter(user=request.user, work_date__range=month_bounds(year, month)).aggregate(
+        n=Count("pk"), hours=Sum("hours"), last=Max("date")
+    )
+    return (request.user.pk, logs["n"], str(logs["hours"])), logs["last"]
+
+
+def _chart_condition(state_func):
+    """ETag / Last-Modified a diagram forrásadatainak utolsó változásából; változatlan adatra 304 a válasz"""
+    def state(request):
+        if not hasattr(request, "_chart_state"):
+            year, month = _chart_params(request)
+            key, last_modified = state_func(request, year, month)
+            etag = hashlib.md5(repr((state_func.__name__, year, month, key, last_modified)).encode()).hexdigest()
+            request._chart_state = etag, last_modified
+        return request._chart_state
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: state(request)[0],
+        last_modified_func=lambda request, *args, **kwargs: state(request)[1],
+    )
+
+
+@boss_required
+@cache_control(private=True, no_cache=True)
+@_chart_condition(_revenue_chart_state)
+def chart_revenue_view(request):
+    """Napi bevétel a hónapra (JSON)"""
+    year, month = _chart_params(request)
+    return JsonResponse({**_monthly_revenue(year, month), **_month_nav(year, month)})
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@_chart_condition(_hours_chart_state)
+def chart_hours_view(request):
+    """A bejelentkezett dolgozó napi ledolgozott órái a hónapra (JSON)"""
+    year, month = _chart_params(request)
+    return JsonResponse({**_user_daily_hours(request.user, year, month), **_month_nav(year, month)})
 
 
 @boss_required
 def employees_list_view(request):
     query = request.GET.get("q", "")
-    qs = CustomUser.objects.filter(is_active=True)
+    year, month = _chart_params(request)
+    monthly_hours = (
+        Log.objects.filter(user=OuterRef("pk"), work_date__range=month_bounds(year, month))
+        .values("user").annotate(t=Sum("hours")).values("t")
+    )
+    active_projects = (
+        ProjectMembership.objects.filter(user=OuterRef("pk"), project__in=Project.objects.active())
+        .values("user").annotate(c=Count("pk")).values("c")
+    )
+    qs = CustomUser.objects.filter(is_active=True).annotate(
+        monthly_hours=Coalesce(Subquery(monthly_hours), Value(0), output_field=DecimalField(max_digits=9, decimal_places=1)),
+        active_projects=Coalesce(Subquery(active_projects), 0),
+    )
     if query:
         qs = qs.filter(Q(first_name__icontains=query) | Q(last_name__icontains=query) | Q(username__icontains=query))
-    today = timezone.now().date()
-    data = []
-    for emp in qs:
-        mh = emp.logs.filter(date__month=today.month, date__year=today.year).aggregate(t=Sum("hours"))["t"] or 0
-        data.append({"employee": emp, "monthly_hours": mh})
-    return render(request, "tracking/employees_list.html", {"employee_data": data, "query": query})
+    data = [{"employee": emp, "monthly_hours": emp.monthly_hours, "active_projects": emp.active_projects} for emp in qs]
+    prev_month, prev_year = (month - 1, year) if month > 1 else (12, year - 1)
+    next_month, next_year = (month + 1, year) if month < 12 else (1, year + 1)
+    return render(request, "tracking/employees_list.html", {
+        "employee_data": data, "query": query,
+        "month": month, "year": year, "month_name": _month_name(month),
+        "prev_month": prev_month, "prev_year": prev_year,
+        "next_month": next_month, "next_year": next_year,
+    })
 
 
 @boss_required
@@ -111,7 +214,9 @@ def delete_employee_view(request, employee_id):
     """Dolgozó törlése"""
     employee = get_object_or_404(CustomUser, pk=employee_id)
     if request.method == "POST":
-        employee.delete()
+        # A számlálókat, a naplót és a pénzügyi cache-t a törlés signal receiverei frissítik
+        with transaction.atomic():
+            employee.delete()
         messages.success(request, f"'{employee.get_full_name() or employee.username}' dolgozó sikeresen törölve.")
         return redirect("employees_list")
     
@@ -121,11 +226,18 @@ def delete_employee_view(request, employee_id):
 @boss_required
 def employee_detail_view(request, employee_id):
     employee = get_object_or_404(CustomUser, pk=employee_id)
+    # A dolgozó órái projektenként egy csoportosított al-lekérdezésben, a projekt összórája a számlálóból
+    employee_hours = Log.objects.filter(user=employee, project=OuterRef("pk")).values("project").annotate(t=Sum("hours")).values("t")
+    projects = Project.objects.filter(memberships__user=employee).annotate(
+        employee_hours=Coalesce(Subquery(employee_hours), Value(0), output_field=DecimalField(max_digits=9, decimal_places=1)),
+    ).order_by("memberships__pk")
     project_data = []
-    for m in ProjectMembership.objects.filter(user=employee).select_related("project"):
-        proj = m.project
-        hours = proj.logs.filter(user=employee).aggregate(t=Sum("hours"))["t"] or 0
-        project_data.append({"project": proj, "hours": hours})
+    for proj in projects:
+        share = float(proj.employee_hours) / float(proj.logged_hours) if proj.logged_hours else 0
+        project_data.append({
+            "project": proj, "hours": proj.employee_hours,
+            "share": round(share * 100), "revenue": round(share * float(proj.revenue)),
+        })
     return render(request, "tracking/employee_detail.html", {"employee": employee, "project_data": project_data})
 
 
@@ -155,8 +267,11 @@ def employee_log_view(request, employee_id, project_id, log_id):
 
 @boss_required
 def all_projects_view(request):
-    projects = Project.objects.all().order_by("-created_at")
-    data = [{"project": p, "total_hours": p.total_logged_hours()} for p in projects]
+    projects = Project.objects.with_stats().order_by("-created_at")
+    data = [{
+        "project": p, "total_hours": p.total_hours, "main_deadline": p.deadline,
+        "is_expired": p.expired, "is_boss_done": p.boss_done,
+    } for p in projects]
     return render(request, "tracking/all_projects.html", {"project_data": data})
 
 
@@ -165,18 +280,33 @@ def boss_project_view(request, project_id):
     project = get_object_or_404(Project, pk=project_id)
     if request.method == "POST" and "complete_project" in request.POST:
         project.is_completed = True
-        project.save()
+        # Csak a lezárás mezői íródnak: a kérés elején betöltött számlálók nem írhatják felül a közbeni növeléseket
+        project.save(update_fields=["is_completed"])
         messages.success(request, "Projekt lezárva.")
         return redirect("boss_project_view", project_id=project_id)
+    # Tagonként csak a legutóbbi N log töltődik be, a többi az employee_project_view oldalon érhető el
+    try:
+        recent_count = max(1, int(request.GET.get("logs", RECENT_LOGS_PER_MEMBER)))
+    except ValueError:
+        recent_count = RECENT_LOGS_PER_MEMBER
+    recent_logs = Log.objects.filter(project=project).order_by("-date")[:recent_count]
+    memberships = ProjectMembership.objects.filter(project=project).select_related("user").prefetch_related(
+        Prefetch("user__logs", queryset=recent_logs, to_attr="recent_project_logs")
+    )
+    totals = {
+        row["user"]: row for row in
+        Log.objects.filter(project=project).values("user").annotate(total_hours=Sum("hours"), log_count=Count("pk"))
+    }
     members_by_role = {}
-    for m in ProjectMembership.objects.filter(project=project).select_related("user"):
+    for m in memberships:
         role = m.user.get_job_role_display_hu()
         if role not in members_by_role:
             members_by_role[role] = []
-        user_logs = Log.objects.filter(user=m.user, project=project).order_by("-date")
+        user_totals = totals.get(m.user_id, {})
         members_by_role[role].append({
-            "user": m.user, "logs": user_logs,
-            "total_hours": user_logs.aggregate(t=Sum("hours"))["t"] or 0,
+            "user": m.user, "logs": m.user.recent_project_logs,
+            "total_hours": user_totals.get("total_hours", 0),
+            "log_count": user_totals.get("log_count", 0),
         })
     return render(request, "tracking/boss_project_view.html", {"project": project, "members_by_role": members_by_role, "project_revenue": project.revenue})
 
@@ -208,9 +338,13 @@ def new_employee_view(request):
 @login_required
 def my_projects_view(request):
     user = request.user
-    memberships = ProjectMembership.objects.filter(user=user).select_related("project")
-    active_count = sum(1 for m in memberships if m.project.is_active)
-    project_data = [{"project": m.project, "completion": m.project.completion_percentage_for_user(user)} for m in memberships]
+    projects = list(Project.objects.with_stats().filter(memberships__user=user).order_by("memberships__pk"))
+    completion = Project.completion_percentages(user, projects)
+    project_data = [{
+        "project": p, "completion": completion[p.pk], "main_deadline": p.deadline,
+        "is_expired": p.expired, "is_active": not p.expired and not p.is_completed,
+    } for p in projects]
+    active_count = sum(1 for item in project_data if item["is_active"])
     return render(request, "tracking/my_projects.html", {"project_data": project_data, "can_add": active_count < 3})
 
 
@@ -224,27 +358,8 @@ def new_project_signup_view(request):
     if user.job_role not in ("videos", "fotos", "iro", "vago"):
         messages.error(request, "Csak videósok, fotósok, forgatókönyv írók és vágók vehetnek fel új projektet.")
         return redirect("my_projects")
-    my_memberships = ProjectMembership.objects.filter(user=user).select_related("project")
-    occupied = set()
-    for m in my_memberships:
-        if m.project.videographer_date:
-            occupied.add(m.project.videographer_date)
-        if m.project.photo_onsite_date:
-            occupied.add(m.project.photo_onsite_date)
-    # Videó típusú projektekhez: videósok, írók és vágók
-    if user.job_role in ("videos", "iro", "vago"):
-        available = [p for p in Project.objects.filter(project_type__in=("video", "both")).exclude(memberships__user=user)
-                     if not p.is_expired and not p.is_completed
-                     and (not p.videographer_date or p.videographer_date not in occupied)
-                     and p.role_has_capacity(user.job_role)]
-    # Fotó típusú projektekhez: fotósok
-    elif user.job_role == "fotos":
-        available = [p for p in Project.objects.filter(project_type__in=("photo", "both")).exclude(memberships__user=user)
-                     if not p.is_expired and not p.is_completed
-                     and (not p.photo_onsite_date or p.photo_onsite_date not in occupied)
-                     and p.role_has_capacity(user.job_role)]
-    else:
-        available = []
+    # Videó típusú projektekhez: videósok, írók és vágók; fotó típusúakhoz: fotósok
+    available = Project.objects.available_for(user)
     confirm_project = None
     if request.method == "POST":
         project_id = request.POST.get("project_id")
@@ -298,46 +413,31 @@ def new_log_view(request, project_id):
     if request.method == "POST":
         form = NewLogForm(request.POST)
         if form.is_valid():
-            log = form.save(commit=False)
-            log.user = user
-            log.project = project
-            log.save()
-            if user.job_role == "iro":
-                for t in request.POST.getlist("new_titles[]"):
-                    t = t.strip()
-                    if t:
-                        if not VideoTitle.objects.filter(project=project, title__iexact=t).exists():
-                            VideoTitle.objects.create(project=project, title=t, created_by=user)
-            elif user.job_role == "videos":
-                for tid in request.POST.getlist("filmed_titles[]"):
-                    try:
-                        vt = VideoTitle.objects.get(pk=int(tid), project=project)
-                        if not vt.raw_uploaded:
-                            vt.raw_uploaded = True
-                            vt.raw_uploaded_by = user
-                            vt.raw_uploaded_at = timezone.now()
-                            vt.save()
-                            LogVideoTitleAction.objects.create(log=log, video_title=vt, action_type="filmed")
-                    except (VideoTitle.DoesNotExist, ValueError):
-                        pass
-            elif user.job_role == "vago":
-                for tid in request.POST.getlist("edited_titles[]"):
-                    try:
-                        vt = VideoTitle.objects.get(pk=int(tid), project=project, raw_uploaded=True)
-                        if not vt.editing_done:
-                            vt.editing_done = True
-                            vt.editing_done_by = user
-                            vt.editing_done_at = timezone.now()
-                            vt.save()
-                            LogVideoTitleAction.objects.create(log=log, video_title=vt, action_type="edited")
-                    except (VideoTitle.DoesNotExist, ValueError):
-                        pass
-            elif user.job_role == "fotos":
-                PhotoLogProgress.objects.create(
-                    log=log,
-                    fieldwork_done="fieldwork_done" in request.POST,
-                    editing_done="editing_done" in request.POST,
-                )
+            # A log és minden mellékhatása egy tranzakcióban íródik, félig mentett log nem maradhat
+            with transaction.atomic():
+                log = form.save(commit=False)
+                log.user = user
+                log.project = project
+                log.save()
+                # A logged_hours-t a Log post_save receiver növeli; a címek bulk írásai signal nélkül futnak, ezért azok számlálói itt nőnek
+                counters = {}
+                if user.job_role == "iro":
+                    created = _create_video_titles(project, user, request.POST.getlist("new_titles[]"))
+                    counters["video_title_count"] = F("video_title_count") + created
+                elif user.job_role == "videos":
+                    filmed = _mark_video_titles(log, request.POST.getlist("filmed_titles[]"), "filmed")
+                    counters["raw_uploaded_count"] = F("raw_uploaded_count") + filmed
+                elif user.job_role == "vago":
+                    edited = _mark_video_titles(log, request.POST.getlist("edited_titles[]"), "edited")
+                    counters["editing_done_count"] = F("editing_done_count") + edited
+                elif user.job_role == "fotos":
+                    PhotoLogProgress.objects.create(
+                        log=log,
+                        fieldwork_done="fieldwork_done" in request.POST,
+                        editing_done="editing_done" in request.POST,
+                    )
+                if counters:
+                    Project.objects.filter(pk=project.pk).update(**counters)
             messages.success(request, "Log sikeresen mentve.")
             return redirect("project_page", project_id=project_id)
         context["form"] = form
@@ -346,6 +446,50 @@ def new_log_view(request, project_id):
     return render(request, "tracking/new_log.html", context)
 
 
+def _create_video_titles(project, user, titles):
+    """Új videó címek felvétele egy bulk_create-tel; kis-nagybetű független duplikáció szűrés egy lekérdezéssel"""
+    seen = {t.casefold() for t in VideoTitle.objects.filter(project=project).values_list("title", flat=True)}
+    new_titles = []
+    for t in titles:
+        t = t.strip()
+        if t and t.casefold() not in seen:
+            seen.add(t.casefold())
+            new_titles.append(VideoTitle(project=project, title=t, created_by=user))
+    VideoTitle.objects.bulk_create(new_titles)
+    return len(new_titles)
+
+
+def _mark_video_titles(log, title_ids, action_type):
+    """Leforgatott / megvágott címek jelölése egy feltételes update-tel és a log műveletek bulk_create-je"""
+    ids = set()
+    for tid in title_ids:
+        try:
+            ids.add(int(tid))
+        except ValueError:
+            pass
+    if action_type == "filmed":
+        pending = VideoTitle.objects.filter(project=log.project, raw_uploaded=False)
+        flag = "raw_uploaded"
+    else:
+        pending = VideoTitle.objects.filter(project=log.project, raw_uploaded=True, editing_done=False)
+        flag = "editing_done"
+    if not ids:
+        return 0
+    # A feltételes update csak a még jelöletlen címeket írja át; párhuzamos beküldésnél a másik log
+    # által közben jelölt cím kimarad, így a számláló és a műveletek is csak a ténylegesen átírt sorokat kapják
+    marked_at = timezone.now()
+    updated = pending.filter(pk__in=ids).update(**{flag: True, f"{flag}_by": log.user, f"{flag}_at": marked_at})
+    if not updated:
+        return 0
+    marked = VideoTitle.objects.filter(
+        project=log.project, pk__in=ids, **{f"{flag}_by": log.user, f"{flag}_at": marked_at}
+    ).values_list("pk", flat=True)
+    LogVideoTitleAction.objects.bulk_create(
+        [LogVideoTitleAction(log=log, video_title_id=pk, action_type=action_type) for pk in marked]
+    )
+    return updated
+
+
 @login_required
 def log_detail_view(request, project_id, log_id):
     user = request.user
@@ -364,11 +508,7 @@ def employee_autocomplete(request):
     q = request.GET.get("q", "")
     if len(q) < 1:
         return JsonResponse({"results": []})
-    qs = CustomUser.objects.filter(
-        Q(first_name__icontains=q) | Q(last_name__icontains=q) | Q(username__icontains=q),
-        is_active=True
-    )[:10]
-    return JsonResponse({"results": [{"id": e.pk, "name": e.get_full_name() or e.username, "role": e.get_job_role_display_hu()} for e in qs]})
+    return JsonResponse({"results": employee_index.search(q, limit=10)})
 
 
 def _month_name(m):
@@ -377,49 +517,50 @@ def _month_name(m):
 
 
 def _monthly_revenue(year, month):
-    _, days = monthrange(year, month)
-    labels, values = [], []
-    for day in range(1, days + 1):
-        d = date(year, month, day)
-        rev = 0
-        for log in Log.objects.filter(date__date=d, project__is_completed=True).select_related("project"):
-            # Az összes munkaórát az adott projekthez használjuk az elosztáshoz
-            total_hours = Log.objects.filter(project=log.project, project__is_completed=True).aggregate(t=Sum("hours"))["t"] or 1
-            rev += float(log.hours) / float(total_hours) * float(log.project.revenue)
-        labels.append(f"{day}.")
-        values.append(round(rev))
-    return {"labels": labels, "values": values}
+    return revenue_series(year, month)
 
 
 def _user_daily_hours(user, year, month):
+    rows = (
+        Log.objects.filter(user=user, work_date__range=month_bounds(year, month))
+        .values("work_date").annotate(t=Sum("hours")).order_by()
+    )
+    hours = {row["work_date"]: float(row["t"]) for row in rows}
     _, days = monthrange(year, month)
     labels, values = [], []
     for day in range(1, days + 1):
-        h = Log.objects.filter(user=user, date__date=date(year, month, day)).aggregate(t=Sum("hours"))["t"] or 0
         labels.append(f"{day}.")
-        values.append(float(h))
+        values.append(hours.get(date(year, month, day), 0.0))
     return {"labels": labels, "values": values}
 
 
-def _emp_revenue(emp, month, year):
-    total = 0
-    # Csoportosítás projektenként
-    projects = set(log.project_id for log in emp.logs.filter(date__month=month, date__year=year))
-    for project_id in projects:
-        project = Project.objects.get(pk=project_id)
-        emp_hours = Log.objects.filter(user=emp, project=project, date__month=month, date__year=year).aggregate(t=Sum("hours"))["t"] or 0
-        total_hours = Log.objects.filter(project=project).aggregate(t=Sum("hours"))["t"] or 0
-        if total_hours > 0:
-            total += float(emp_hours) / float(total_hours) * float(project.revenue)
-    return round(total)
-
-
-def _emp_proj_revenue(emp, project):
-    emp_hours = Log.objects.filter(user=emp, project=project).aggregate(t=Sum("hours"))["t"] or 0
-    total_hours = Log.objects.filter(project=project).aggregate(t=Sum("hours"))["t"] or 0
-    if total_hours > 0:
-        return round(float(emp_hours) / float(total_hours) * float(project.revenue))
-    return 0
+@boss_required
+def leaderboard_view(request):
+    """Dolgozók rangsora a hónapban hozzájuk rendelt bevétel vagy a ledolgozott órák szerint"""
+    year, month = _chart_params(request)
+    sort = "hours" if request.GET.get("sort") == "hours" else "revenue"
+    stats = employee_revenue(year, month)
+    # Minden aktív dolgozó szerepel (nulla értékkel is), a bossok csak ha logoltak a hónapban
+    employees = CustomUser.objects.filter(Q(is_active=True, is_boss=False) | Q(pk__in=stats)).order_by(
+        "last_name", "first_name", "username"
+    )
+    empty = {"hours": 0, "revenue": 0, "projects": 0}
+    rows = [{"employee": emp, **stats.get(emp.pk, empty)} for emp in employees]
+    other = "revenue" if sort == "hours" else "hours"
+    rows.sort(key=lambda row: (row[sort], row[other]), reverse=True)
+    top = rows[0][sort] if rows else 0
+    for i, row in enumerate(rows):
+        # Holtversenyben azonos helyezés
+        tied = i and row[sort] == rows[i - 1][sort]
+        row["rank"] = rows[i - 1]["rank"] if tied else i + 1
+        row["share"] = round(row[sort] / top * 100) if top else 0
+    return render(request, "tracking/leaderboard.html", {
+        "rows": rows,
+        "sort": sort,
+        "total_revenue": sum(row["revenue"] for row in rows),
+        "total_hours": sum(row["hours"] for row in rows),
+        **_month_nav(year, month),
+    })
 
 
 @boss_required
@@ -428,8 +569,8 @@ def boss_manage_projects_view(request):
     active_projects = Project.objects.filter(is_completed=False).order_by("-created_at")
     completed_projects = Project.objects.filter(is_completed=True).order_by("-created_at")
     
-    active_data = [{"project": p, "total_hours": p.total_logged_hours()} for p in active_projects]
-    completed_data = [{"project": p, "total_hours": p.total_logged_hours()} for p in completed_projects]
+    active_data = [{"project": p, "total_hours": p.total_hours} for p in active_projects.with_stats()]
+    completed_data = [{"project": p, "total_hours": p.total_hours} for p in completed_projects.with_stats()]
     
     return render(request, "tracking/boss_manage_projects.html", {
         "active_data": active_data,
@@ -443,7 +584,8 @@ def edit_project_view(request, project_id):
     project = get_object_or_404(Project, pk=project_id)
     form = EditProjectForm(request.POST or None, instance=project)
     if request.method == "POST" and form.is_valid():
-        form.save()
+        # Csak a módosított űrlap mezők íródnak, a számlálók nem (lásd boss_project_view)
+        form.save(commit=False).save(update_fields=form.changed_data)
         messages.success(request, "Projekt sikeresen módosítva.")
         return redirect("boss_manage_projects")
     
@@ -471,121 +613,97 @@ def delete_project_view(request, project_id):
     return render(request, "tracking/delete_project.html", {"project": project})
 
 
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _in_parallel(func, *args):
+    """Csak olvasó függvény külön szálon és kapcsolaton, hogy a kérés async ORM lekérdezéseivel egyszerre fusson"""
+    def run():
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return await sync_to_async(run, thread_sensitive=False)()
+
+
 @boss_required
-def expenses_view(request):
+async def expenses_view(request):
     """Kiadások oldal - hónapra lebontott profit oldalsó panel"""
-    today = timezone.now().date()
-    current_month = today.month
-    current_year = today.year
-    
-    # Az aktuális év hónapainak profit adatai az oldalsó panelhez
-    monthly_profits = _yearly_monthly_profits(current_year)
-    
-    month = int(request.GET.get("month", current_month))
-    year = int(request.GET.get("year", current_year))
-    
-    # Kiadások rendezése a kiválasztott hónapra
-    all_expenses = Expense.objects.filter(date__year=year, date__month=month).order_by("-date")
-    total_expense = all_expenses.aggregate(total=Sum("amount"))["total"] or 0
-    
-    # Havi bevétel kiszámítása
-    monthly_revenue = _month_revenue_value(year, month)
-    
-    # Havi profit
-    monthly_profit = monthly_revenue - float(total_expense)
-    
+    year, month = _chart_params(request)
+    # Hány korábbi évvel hasonlítjuk össze a kiválasztott évet
+    try:
+        compare = max(0, min(int(request.GET.get("compare", 1)), 10))
+    except ValueError:
+        compare = 1
+
     # New expense form kezelése
     form = ExpenseForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
         expense = form.save(commit=False)
         expense.created_by = request.user
-        expense.save()
+        await expense.asave()
         messages.success(request, "Kiadás sikeresen felvéve.")
         return redirect("expenses")
-    
+
+    # A kiválasztott év és az összehasonlított évek havi adatai egy lépésben, a hónap kiadásaival párhuzamosan
+    years = list(range(year - compare, year + 1))
+    totals, all_expenses = await asyncio.gather(
+        _in_parallel(cached_monthly_totals, years),
+        _alist(Expense.objects.filter(date__year=year, date__month=month).select_related("created_by").order_by("-date")),
+    )
+    monthly_profits = _yearly_monthly_profits(years, totals)
+    total_expense = totals[(year, month)]["expenses"]
+    monthly_revenue = totals[(year, month)]["revenue"]
+    monthly_profit = monthly_revenue - total_expense
+    export_start, export_end = month_bounds(year, month)
+
     return render(request, "tracking/expenses.html", {
         "form": form,
         "month": month,
         "year": year,
+        "compare": compare,
         "month_name": _month_name(month),
         "monthly_profits": monthly_profits,
         "expenses": all_expenses,
         "total_expense": total_expense,
         "monthly_revenue": monthly_revenue,
         "monthly_profit": monthly_profit,
+        "export_start": export_start,
+        "export_end": export_end,
     })
 
 
 def _monthly_profit(year, month):
     """Hónapra lebontott bevétel - kiadások = profit diagram"""
-    _, days = monthrange(year, month)
-    labels, values = [], []
-    
-    for day in range(1, days + 1):
-        d = date(year, month, day)
-        rev = 0
-        
-        # Bevétel kiszámítása az adott napra
-        for log in Log.objects.filter(date__date=d, project__is_completed=True).select_related("project"):
-            total_hours = Log.objects.filter(project=log.project, project__is_completed=True).aggregate(t=Sum("hours"))["t"] or 1
-            rev += float(log.hours) / float(total_hours) * float(log.project.revenue)
-        
-        # Kiadások összesen az adott napon
-        expenses = Expense.objects.filter(date=d).aggregate(total=Sum("amount"))["total"] or 0
-        
-        # Profit = bevétel - kiadások
-        profit = rev - float(expenses)
-        
-        labels.append(f"{day}.")
-        values.append(round(profit))
-    
-    return {"labels": labels, "values": values}
+    return profit_series(year, month)
 
 
-def _yearly_monthly_profits(year):
-    """Az év összes hónapjának profit adatait visszaadja oldalsó panelhez"""
-    monthly_data = []
+def _yearly_monthly_profits(years, totals=None):
+    """A megadott évek havi bevétel/kiadás/profit adatai egymás mellett, oldalsó panelhez"""
     today = timezone.now().date()
-    
+    if totals is None:
+        totals = cached_monthly_totals(years)
+    monthly_data = []
     for month in range(1, 13):
-        # Havi bevétel
-        revenue = _month_revenue_value(year, month)
-        
-        # Havi kiadások
-        expenses = Expense.objects.filter(date__year=year, date__month=month).aggregate(total=Sum("amount"))["total"] or 0
-        
-        # Havi profit
-        profit = revenue - float(expenses)
-        
-        is_current = (month == today.month and year == today.year)
-        
+        per_year = []
+        for year in years:
+            t = totals[(year, month)]
+            per_year.append({
+                "year": year,
+                "revenue": round(t["revenue"]),
+                "expenses": round(t["expenses"]),
+                "profit": round(t["revenue"] - t["expenses"]),
+            })
         monthly_data.append({
             "month": month,
             "month_name": _month_name(month),
-            "revenue": round(revenue),
-            "expenses": round(float(expenses)),
-            "profit": round(profit),
-            "is_current": is_current,
+            "years": per_year,
+            "is_current": month == today.month and years[-1] == today.year,
         })
-    
     return monthly_data
 
 
-def _month_revenue_value(year, month):
-    """Egy hónap összes bevételét számítja ki"""
-    revenue = 0
-    _, days = monthrange(year, month)
-    
-    for day in range(1, days + 1):
-        d = date(year, month, day)
-        
-        for log in Log.objects.filter(date__date=d, project__is_completed=True).select_related("project"):
-            total_hours = Log.objects.filter(project=log.project, project__is_completed=True).aggregate(t=Sum("hours"))["t"] or 1
-            revenue += float(log.hours) / float(total_hours) * float(log.project.revenue)
-    
-    return revenue
-
-
 @boss_required
 def delete_expense_view(request, expense_id):
     """Kiadás törlés"""
@@ -595,11 +713,147 @@ def delete_expense_view(request, expense_id):
         messages.success(request, "Kiadás sikeresen törölve.")
         return redirect("expenses")
     
-    year = int(request.GET.get("year", timezone.now().year))
-    month = int(request.GET.get("month", timezone.now().month))
+    year, month = _chart_params(request)
     
     return render(request, "tracking/delete_expense.html", {
         "expense": expense,
         "year": year,
         "month": month,
     })
+
+
+class _Echo:
+    """Pszeudo-puffer a csv.writer-nek: a sort visszaadja ahelyett, hogy eltárolná"""
+    def write(self, value):
+        return value
+
+
+def _export_period(request):
+    """Az export ?start= és ?end= (ÉÉÉÉ-HH-NN) határai, alapból az aktuális hónap"""
+    today = timezone.now().date()
+    default_start, default_end = month_bounds(today.year, today.month)
+    start = date.fromisoformat(request.GET.get("start") or default_start.isoformat())
+    end = date.fromisoformat(request.GET.get("end") or default_end.isoformat())
+    return start, end
+
+
+def _async_chunks(iterator):
+    """Szinkron generátor async iterátorként: EXPORT_CHUNK_SIZE soronként egy sync_to_async hívás"""
+    next_chunk = sync_to_async(lambda: "".join(islice(iterator, EXPORT_CHUNK_SIZE)))
+
+    async def chunks():
+        while chunk := await next_chunk():
+            yield chunk
+
+    return chunks()
+
+
+def _csv_response(request, filename, header, rows):
+    """Soronként generált CSV válasz; a memória a sorok számától függetlenül állandó
+
+    ASGI alatt a szinkron iterátort a Django egyben, listaként olvasná be, ezért ott async iterátor megy ki.
+    """
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield "\ufeff"  # BOM, hogy az Excel UTF-8-ként nyissa meg az ékezeteket
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    content = _async_chunks(stream()) if isinstance(request, ASGIRequest) else stream()
+    response = StreamingHttpResponse(content, content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@boss_required
+def export_logs_view(request):
+    """Az időszak összes logja CSV-ben (könyveléshez)"""
+    try:
+        start, end = _export_period(request)
+    except ValueError:
+        messages.error(request, "Érvénytelen dátum (ÉÉÉÉ-HH-NN formátum szükséges).")
+        return redirect("expenses")
+    roles = dict(CustomUser.JOB_ROLES)
+    logs = (
+        Log.objects.filter(work_date__range=(start, end)).order_by("work_date", "pk")
+        .values_list(
+            "work_date", "date", "user__username", "user__first_name", "user__last_name", "user__job_role",
+            "project__title", "project__company", "hours", "comment",
+        )
+    )
+
+    def rows():
+        for work_date, logged_at, username, first, last, role, project, company, hours, comment in logs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield (
+                work_date.isoformat(), timezone.localtime(logged_at).strftime("%Y-%m-%d %H:%M"),
+                f"{first} {last}".strip() or username, username, roles.get(role, "-"),
+                project, company, hours, comment or "",
+            )
+
+    return _csv_response(
+        request, f"logok_{start:%Y%m%d}_{end:%Y%m%d}.csv",
+        ["Nap", "Rögzítve", "Dolgozó", "Felhasználónév", "Szerepkör", "Projekt", "Cég", "Órák", "Megjegyzés"],
+        rows(),
+    )
+
+
+@boss_required
+def export_expenses_view(request):
+    """Az időszak összes kiadása CSV-ben (könyveléshez)"""
+    try:
+        start, end = _export_period(request)
+    except ValueError:
+        messages.error(request, "Érvénytelen dátum (ÉÉÉÉ-HH-NN formátum szükséges).")
+        return redirect("expenses")
+    expenses = (
+        Expense.objects.filter(date__range=(start, end)).order_by("date", "pk")
+        .values_list("date", "description", "amount", "created_by__username", "created_by__first_name", "created_by__last_name")
+    )
+
+    def rows():
+        for day, description, amount, username, first, last in expenses.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield day.isoformat(), description, amount, f"{first or ''} {last or ''}".strip() or username or ""
+
+    return _csv_response(
+        request, f"kiadasok_{start:%Y%m%d}_{end:%Y%m%d}.csv",
+        ["Dátum", "Leírás", "Összeg (Ft)", "Felvevő"],
+        rows(),
+    )
+
+
+def _payroll_params(request):
+    year, month = _chart_params(request)
+    # mode=hours: a díj a logolt órák arányában oszlik el a hónapok között
+    return year, month, request.GET.get("mode") == "hours"
+
+
+@boss_required
+def payroll_view(request):
+    """Havi bérjegyzék dolgozónként a projekt szerepkör díjakból"""
+    year, month, prorate = _payroll_params(request)
+    employees = monthly_payroll(year, month, prorate)
+    return render(request, "tracking/payroll.html", {
+        "employees": employees,
+        "total": sum(e["total"] for e in employees),
+        "line_count": sum(len(e["lines"]) for e in employees),
+        "mode": "hours" if prorate else "completed",
+        **_month_nav(year, month),
+    })
+
+
+@boss_required
+def export_payroll_view(request):
+    """A havi bérjegyzék soronként CSV-ben (könyveléshez)"""
+    year, month, prorate = _payroll_params(request)
+    rows = (
+        (line["name"], line["username"], line["role"], line["project"], line["company"],
+         line["pay"], line["month_hours"], line["total_hours"], line["amount"])
+        for line in payroll_lines(year, month, prorate)
+    )
+    return _csv_response(
+        request, f"berjegyzek_{year}_{month:02d}{'_orak' if prorate else ''}.csv",
+        ["Dolgozó", "Felhasználónév", "Szerepkör", "Projekt", "Cég", "Díj (Ft)", "Órák a hónapban", "Összes óra", "Fizetendő (Ft)"],
+        rows,
+    )